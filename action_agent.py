@@ -1,41 +1,120 @@
 import json
 import os
-from flask import Flask, request, jsonify
+import threading
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS  # 解决前端跨域请求问题
-from match import calculate_skeleton_similarity, load_skeletons_from_dir  # 复用现有匹配算法
+try:
+    from flask_sock import Sock  # WebSocket姿势流（可选，未安装时只提供HTTP接口）
+except ImportError:
+    Sock = None
+from skeleton_dataset import load_skeletons_from_dir  # 复用现有的骨架加载
+from skeleton_library import SkeletonLibrary, get_metric, match_many  # 样本库向量化比对
+from pose_index import MIN_INDEXED, PoseIndex  # 大样本库的top-k检索索引
+from sequence_match import SequenceMatcher  # 实时姿势流的动作序列对齐
+from library_watcher import LibraryWatcher  # 样本库热更新
+from feedback_jobs import FeedbackJobs  # AI反馈后台生成
+from feedback_cache import FeedbackCache  # AI反馈缓存
+import pose_wire  # 骨架数据的二进制传输格式
+from skeleton_dataset import FIELDS, LANDMARK_ORDER, SkeletonDataset
+from pose_stream import PoseStream  # 实时姿势流（只处理最新帧）
 from chat import client  # 复用现有AI模型客户端（避免重复配置）
+# 序列对齐的参考动作最多的帧数（每次对齐的耗时和内存随参考帧数增长）
+MAX_REFERENCE_FRAMES = 3000
 # 动作比较智能体核心类（调度+逻辑处理）
 class ActionAgent:
-    def __init__(self):
+    def __init__(self, metric="average", feedback_cache_path=None, feedback_variants=1, use_index=False,
+                 session_root="./sessions", snapshot_dir=None, reference_routine=None):
         # 初始化状态变量
         self.sample_skeletons = []  # 存储加载的样本骨架（格式：[(样本名, 骨架数据), ...]）
-        self.match_threshold = 0.15  # 匹配阈值（越小越严格，可后续调整）
+        self.sample_library = None  # 打包成数组的样本库，用于向量化比对
+        # 单帧比对使用的匹配器：默认为sample_library本身（下界剪枝，结果与逐个样本比较完全一致）；
+        # use_index为True且样本数达到MIN_INDEXED时为PoseIndex（只对top-k候选精确评分，更快但是近似结果：
+        # 默认n_probe=8时约1%的比对返回的不是真正的最佳样本，match_stats中的剪枝计数也不再统计这些比对）
+        self.use_index = use_index
+        self.sample_matcher = None
+        self.metric = get_metric(metric).name  # 评分方式（见skeleton_library.METRICS注册表）
+        self.watcher = None  # 样本库热更新（watch_samples启动）
+        self.feedback_jobs = FeedbackJobs(self.generate_feedback)  # AI反馈在后台线程池中生成，不阻塞比对结果的返回
+        # 相同比对结果（样本、评分区间、是否成功）复用已生成的反馈；设置路径时缓存保存到磁盘
+        self.feedback_cache = FeedbackCache(variants=feedback_variants, path=feedback_cache_path)
+        self.match_threshold = get_metric(metric).threshold  # 匹配阈值（越小越严格，average默认0.15）
+        self.session_root = os.path.realpath(session_root)  # 离线评分只能读取该文件夹下的录制数据
+        self.snapshot_dir = snapshot_dir  # 样本库快照的缓存文件夹（为None时不保存快照，每次启动重新解析JSON）
+        # 实时姿势流序列对齐使用的参考动作（一套按时间顺序排列的动作骨架文件夹），为None时不做序列对齐
+        self.reference_routine = reference_routine
+        self.reference_library = None
+        self._reference_lock = threading.Lock()
 
     def load_samples(self, sample_dir="./test_files/video_output"):
-        """第一步：加载样本骨架库（从posemesh.py生成的文件夹中读取）"""
+        """
+        第一步：加载样本骨架库
+        sample_dir可以是posemesh.py生成的JSON文件夹，也可以是skeleton_dataset.py导出的二进制数据集（内存映射，几乎不耗时）
+        """
         # 调用match.py的现成函数，加载所有样本骨架
-        self.sample_skeletons = load_skeletons_from_dir(sample_dir)
+        sample_skeletons = load_skeletons_from_dir(sample_dir, snapshot_dir=self.snapshot_dir)
+        # 加载时一次性打包，之后每次比对只需几次数组运算（评分与该评分方式的逐点实现一致）
+        self.sample_library = SkeletonLibrary(sample_skeletons, metric=self.metric)
+        self.sample_matcher = self._build_matcher(self.sample_library)
+        self.sample_skeletons = sample_skeletons
         print(f"✅ 成功加载 {len(self.sample_skeletons)} 个样本骨架")
         return len(self.sample_skeletons)  # 返回样本数量，用于前端验证
 
+    def _build_matcher(self, library):
+        """样本库较大时建立检索索引，单帧比对不再与每个样本打分"""
+        if self.use_index and len(library) >= MIN_INDEXED:
+            return PoseIndex(library)
+        return library
+
+    def _swap_samples(self, skeletons, library):
+        # 新样本库已在后台完整构建，这里只做引用替换；比对请求开始时取一次引用，不会看到构建到一半的样本库
+        matcher = self._build_matcher(library)
+        self.sample_library = library
+        self.sample_matcher = matcher
+        self.sample_skeletons = skeletons
+        print(f"🔄 样本库已更新，共 {len(library)} 个样本骨架")
+
+    def watch_samples(self, sample_dir="./test_files/video_output", interval=2.0):
+        """
+        加载样本骨架库并启动热更新：样本文件夹中的文件新增、修改或删除时，
+        后台只重新解析变化的文件并重建样本库，完成后原子替换，无需重启服务
+        """
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.watcher = LibraryWatcher(sample_dir, self._swap_samples, metric=self.metric, interval=interval,
+                                      snapshot_dir=self.snapshot_dir)
+        self.watcher.scan()  # 首次加载在当前线程完成
+        self.watcher.start()
+        return len(self.sample_library) if self.sample_library else 0
+
+    def sequence_matcher(self, window=30, step=5):
+        """
+        实时姿势流的序列对齐器：最近window帧每step帧与参考动作做一次带宽DTW对齐
+        只在配置了reference_routine时启用（样本库可能包含多套动作，按名称排序后并不是一条时间轴）；
+        参考动作不足window帧或超过MAX_REFERENCE_FRAMES帧（每次对齐的耗时随帧数增长，会拖慢姿势流）时返回None
+        """
+        if not self.reference_routine:
+            return None
+        with self._reference_lock:
+            if self.reference_library is None:
+                skeletons = load_skeletons_from_dir(self.reference_routine, snapshot_dir=self.snapshot_dir)
+                self.reference_library = SkeletonLibrary(skeletons, metric=self.metric)
+                if len(skeletons) > MAX_REFERENCE_FRAMES:
+                    print(f"⚠️ 参考动作共 {len(skeletons)} 帧，超过 {MAX_REFERENCE_FRAMES} 帧，不做序列对齐")
+        library = self.reference_library
+        if not window <= len(library) <= MAX_REFERENCE_FRAMES:
+            return None
+        return SequenceMatcher(library, window=window, step=step)
+
     def compare_skeleton(self, input_skel):
-        """第二步：比对输入骨架与样本库，返回最佳匹配结果"""
+        """第二步：比对输入骨架（骨架字典或已打包的关键点数组）与样本库，返回最佳匹配结果"""
+        # 取一次匹配器引用，热更新替换样本库时本次比对仍使用同一个完整的样本库
+        matcher = self.sample_matcher
         # 先检查样本库是否为空
-        if not self.sample_skeletons:
+        if matcher is None or not len(matcher):
             return None, "❌ 样本库为空，请先加载样本"
         
-        best_score = float('inf')  # 初始最佳分数（越小越匹配）
-        best_sample_name = None    # 最佳匹配的样本名
-
-        # 遍历所有样本，找到与输入骨架最匹配的
-        for sample_name, sample_skel in self.sample_skeletons:
-            # 调用match.py的相似度计算函数（核心算法复用）
-            similarity_score = calculate_skeleton_similarity(input_skel, sample_skel)
-            
-            # 更新最佳匹配（分数更小=更匹配）
-            if similarity_score < best_score:
-                best_score = similarity_score
-                best_sample_name = sample_name
+        # 与样本库打分（大样本库只对检索索引给出的候选打分），取分数最小（最匹配）的样本
+        best_sample_name, best_score = matcher.best_match(input_skel)
 
         # 判断是否匹配成功（分数 < 阈值）
         is_match_success = best_score < self.match_threshold
@@ -48,11 +127,102 @@ class ActionAgent:
             "匹配阈值": self.match_threshold
         }, None  # 第二个返回值为错误信息，无错误则为None
 
+    def match_stats(self):
+        """比对统计：样本库的下界剪枝跳过了多少样本（比对结果与逐个计算完全一致）"""
+        library = self.sample_library
+        stats = library.prune_stats() if library else {}
+        matcher = self.sample_matcher
+        if isinstance(matcher, PoseIndex):
+            stats["pose_index"] = {"n_cells": matcher.n_cells, "n_probe": matcher.n_probe, "k": matcher.k}
+        if self.watcher is not None:
+            stats["hot_reload"] = self.watcher.stats()
+        stats["feedback_jobs"] = self.feedback_jobs.stats()
+        stats["feedback_cache"] = self.feedback_cache.stats()
+        return stats
+
+    def resolve_session_dir(self, session_dir):
+        """把请求中的录制数据路径解析为session_root下的真实路径，解析后不在session_root内（如../、绝对路径、符号链接）时返回None"""
+        path = os.path.realpath(os.path.join(self.session_root, session_dir))
+        if os.path.commonpath([path, self.session_root]) != self.session_root:
+            return None
+        return path
+
+    def grade_session(self, session_dir):
+        """
+        离线评分：把录制好的一组骨架（JSON文件夹或二进制数据集）一次性与样本库做N×M匹配
+        session_dir: 相对于session_root的路径
+        """
+        library = self.sample_library
+        if library is None or not len(library):
+            return None, "❌ 样本库为空，请先加载样本"
+        path = self.resolve_session_dir(session_dir)
+        if path is None:
+            return None, f"❌ 录制数据不在允许的文件夹中：{session_dir}"
+        if not os.path.exists(path):
+            return None, f"❌ 录制数据不存在：{session_dir}"
+
+        # 在请求线程中计算：不保存快照，也不为每个请求启动进程池
+        session_skeletons = load_skeletons_from_dir(path)
+        results = match_many(session_skeletons, library, workers=1, keep_scores=False)
+        return self._summarize(results, "输入文件"), None
+
+    def compare_skeletons(self, input_skels):
+        """
+        批量比对：一组骨架（[骨架字典, ...] 或 [(帧名, 骨架字典), ...]）在一次向量化计算中与样本库比对
+        返回逐帧的最佳匹配和汇总结果
+        """
+        library = self.sample_library
+        if library is None or not len(library):
+            return None, "❌ 样本库为空，请先加载样本"
+        # 在请求线程中直接计算（一次评分矩阵运算），不启动多进程
+        results = match_many(input_skels, library, workers=1, keep_scores=False)
+        return self._summarize(results, "输入帧"), None
+
+    def _summarize(self, results, name_key):
+        """
+        把match_many的结果整理为逐帧结果和汇总（grade_session与compare_skeletons共用）
+        没有可比较关键点的帧：样本名称和相似度分数为None，计为匹配失败
+        最佳帧：评分最小的一帧，格式与compare_skeleton的比对结果相同，可直接用于生成AI反馈
+        """
+        frames = []
+        for input_name, best_name, best_score in zip(results.names, results.best_names, results.best_scores):
+            valid = best_name is not None
+            frames.append({
+                name_key: input_name,
+                "样本名称": best_name,
+                "相似度分数": round(float(best_score), 4) if valid else None,
+                "是否匹配成功": bool(valid and best_score < self.match_threshold)
+            })
+        scored = [frame for frame in frames if frame["样本名称"] is not None]
+        best_frame = min(scored, key=lambda frame: frame["相似度分数"]) if scored else None
+        success_count = sum(frame["是否匹配成功"] for frame in frames)
+        return {
+            "帧数": len(frames),
+            "匹配成功帧数": success_count,
+            "匹配成功率": round(success_count / len(frames), 4) if frames else 0.0,
+            "匹配阈值": self.match_threshold,
+            "平均分数": round(sum(frame["相似度分数"] for frame in scored) / len(scored), 4) if scored else None,
+            "最佳帧": {
+                name_key: best_frame[name_key],
+                "样本名称": best_frame["样本名称"],
+                "相似度分数": best_frame["相似度分数"],
+                "是否匹配成功": best_frame["是否匹配成功"],
+                "匹配阈值": self.match_threshold
+            } if best_frame else None,
+            "逐帧结果": frames
+        }
+
     def generate_feedback(self, match_result):
         """第三步：根据比对结果，调用AI生成自然语言反馈"""
         if not match_result:
             return "❌ 未完成动作比对，请先上传动作数据"
 
+        # 先查缓存：同一样本、同一评分区间、同样的成功/失败结果已有反馈时直接返回
+        cache_key = self.feedback_cache.key(match_result)
+        cached_feedback = self.feedback_cache.get(cache_key)
+        if cached_feedback is not None:
+            return cached_feedback
+
         # 构造AI提示词（让反馈更精准，贴合太极教学场景）
         prompt = f"""
         你是太极动作教学助手，根据以下动作比对结果，生成简洁易懂的反馈：
@@ -71,14 +241,27 @@ class ActionAgent:
             max_tokens=150  # 限制反馈长度，避免冗余
         )
 
-        # 提取AI反馈内容并返回
-        return response.choices[0].message.content.strip()
+        # 提取AI反馈内容，加入缓存后返回
+        feedback = response.choices[0].message.content.strip()
+        self.feedback_cache.put(cache_key, feedback)
+        return feedback
     # 初始化Flask服务（供前端调用）
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求（前端和后端端口不同时必需）
 
-# 初始化动作比较智能体实例
-action_agent = ActionAgent()
+# 初始化动作比较智能体实例（评分方式可通过环境变量ACTION_METRIC选择，默认average；
+# FEEDBACK_CACHE_PATH设置反馈缓存文件，FEEDBACK_VARIANTS设置每种结果缓存几条不同的反馈；
+# ACTION_POSE_INDEX=1时大样本库的单帧比对使用检索索引（近似结果，默认不使用）；
+# SESSION_ROOT设置离线评分可以读取的录制数据文件夹，默认./sessions；
+# SKELETON_SNAPSHOT_DIR设置样本库快照的缓存文件夹，设置后服务重启时不必重新解析样本JSON；
+# ACTION_REFERENCE_ROUTINE设置实时姿势流序列对齐使用的参考动作文件夹，未设置时不做序列对齐）
+action_agent = ActionAgent(metric=os.environ.get("ACTION_METRIC", "average"),
+                           feedback_cache_path=os.environ.get("FEEDBACK_CACHE_PATH"),
+                           feedback_variants=int(os.environ.get("FEEDBACK_VARIANTS", "1")),
+                           use_index=os.environ.get("ACTION_POSE_INDEX", "0") != "0",
+                           session_root=os.environ.get("SESSION_ROOT", "./sessions"),
+                           snapshot_dir=os.environ.get("SKELETON_SNAPSHOT_DIR"),
+                           reference_routine=os.environ.get("ACTION_REFERENCE_ROUTINE"))
 
 # 接口1：加载样本骨架库（前端可主动调用，验证样本是否加载成功）
 @app.route('/api/load-samples', methods=['GET'])
@@ -90,15 +273,57 @@ def api_load_samples():
         "提示": f"已从 test_files/video_output 加载 {sample_count} 个样本骨架"
     })
 
-# 接口2：核心接口——接收前端骨架数据，返回比对结果+AI反馈
+def read_binary_frames():
+    """Content-Type为二进制骨架格式时解码请求体（见pose_wire.py），否则返回None按JSON处理；格式错误时抛出ValueError"""
+    if request.mimetype != pose_wire.CONTENT_TYPE:
+        return None
+    return pose_wire.decode_frames(request.get_data())
+
+def request_flag(request_data, name, default=False):
+    """读取请求选项：JSON中的布尔值，或查询参数中的 1/0、true/false"""
+    value = request_data.get(name, default)
+    if isinstance(value, str):
+        return value.strip().lower() not in ('', '0', 'false', 'no')
+    return bool(value)
+
+def submit_feedback(match_result, request_data):
+    """
+    提交后台AI反馈任务，返回要加入响应的字段
+    请求带client_id时，同一客户端相同比对结果（反馈缓存键相同）未完成的任务会被复用；
+    不按客户端地址合并（共用NAT/代理的学员地址相同）；任务已满时本次不生成反馈
+    """
+    client_id = request_data.get('client_id')
+    cache_key = action_agent.feedback_cache.key(match_result)
+    key = (client_id, cache_key) if client_id is not None and cache_key is not None else None
+    job_id = action_agent.feedback_jobs.submit(match_result, key=key)
+    if job_id is None:
+        return {"反馈编号": None, "反馈提示": "AI反馈任务繁忙，本次不生成反馈"}
+    return {
+        "反馈编号": job_id,
+        "反馈查询": f"/api/feedback/{job_id}",
+        "反馈推送": f"/api/feedback/{job_id}/stream"
+    }
+
+# 接口2：核心接口——接收前端骨架数据，立即返回比对结果和反馈编号，AI反馈在后台生成（请求中带 "feedback": false 时不生成）
+# （带 "wait_feedback": true 时按原来的方式等待AI反馈一起返回）
+# 请求体可以是JSON（{"skeleton": {...}}），也可以是二进制骨架格式（Content-Type: application/x-pose-frames，取第一帧）
 @app.route('/api/compare-action', methods=['POST'])
 def api_compare_action():
-    # 1. 接收前端发送的骨架数据（JSON格式）
-    request_data = request.get_json()
-    input_skeleton = request_data.get('skeleton')  # 前端传入的用户骨架数据
+    # 1. 接收前端发送的骨架数据
+    try:
+        frames = read_binary_frames()
+    except ValueError as e:
+        return jsonify({"状态": "失败", "错误信息": str(e)}), 400
+    if frames is not None:
+        # 二进制格式的选项通过查询参数传递（如 ?wait_feedback=1）
+        request_data = request.args
+        input_skeleton = pose_wire.packed_frames(frames)[0] if len(frames.landmarks) else None
+    else:
+        request_data = request.get_json() or {}
+        input_skeleton = request_data.get('skeleton')  # 前端传入的用户骨架数据
 
     # 2. 检查是否收到骨架数据
-    if not input_skeleton:
+    if input_skeleton is None or not len(input_skeleton):
         return jsonify({"状态": "失败", "错误信息": "未收到骨架数据，请上传动作"}), 400
 
     # 3. 调用智能体的比对功能
@@ -106,23 +331,183 @@ def api_compare_action():
     if error_msg:
         return jsonify({"状态": "失败", "错误信息": error_msg}), 400
 
-    # 4. 调用智能体的AI反馈功能
-    ai_feedback = action_agent.generate_feedback(match_result)
+    # 4. 同步模式等待AI反馈后一起返回；请求AI反馈时提交后台任务，比对结果立即返回给前端
+    response = {"状态": "成功", "比对结果": match_result}
+    if request_flag(request_data, 'wait_feedback'):
+        response["AI动作反馈"] = action_agent.generate_feedback(match_result)
+    elif request_flag(request_data, 'feedback', default=True):
+        response.update(submit_feedback(match_result, request_data))
+    return jsonify(response)
 
-    # 5. 返回最终结果给前端
-    return jsonify({
-        "状态": "成功",
-        "比对结果": match_result,
-        "AI动作反馈": ai_feedback
-    })
+# 接口2.1：轮询AI反馈（可带 ?wait=秒数 在服务端最多等待这么久）
+@app.route('/api/feedback/<job_id>', methods=['GET'])
+def api_feedback(job_id):
+    timeout = min(request.args.get('wait', 0, type=float), 30.0)
+    result = action_agent.feedback_jobs.get(job_id, timeout=timeout)
+    if result is None:
+        return jsonify({"状态": "失败", "错误信息": "反馈编号不存在或已过期"}), 404
+    return jsonify(result)
+
+# 接口2.2：通过SSE推送AI反馈，生成完成后发送一条feedback事件并结束（等待期间定时发送注释行保持连接）
+@app.route('/api/feedback/<job_id>/stream', methods=['GET'])
+def api_feedback_stream(job_id):
+    if action_agent.feedback_jobs.get(job_id) is None:
+        return jsonify({"状态": "失败", "错误信息": "反馈编号不存在或已过期"}), 404
+
+    def events():
+        while True:
+            result = action_agent.feedback_jobs.get(job_id, timeout=15.0)
+            if result is None:
+                result = {"状态": "失败", "错误信息": "反馈编号不存在或已过期"}
+            elif result["状态"] == "等待中":
+                yield ": waiting\n\n"
+                continue
+            yield f"event: feedback\ndata: {json.dumps(result, ensure_ascii=False)}\n\n"
+            return
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# 接口2.3：批量比对——一次请求上传多帧骨架（"skeletons": [骨架, ...]，或整段录制 "clip": {帧名: 骨架, ...}），
+# 一次向量化计算返回逐帧结果和汇总；整段只按最佳帧在后台生成一次AI反馈（带 "feedback": false 时不生成）
+MAX_BATCH_FRAMES = 5000  # 单次请求最多的帧数
+
+@app.route('/api/compare-actions', methods=['POST'])
+def api_compare_actions():
+    try:
+        frames = read_binary_frames()
+    except ValueError as e:
+        return jsonify({"状态": "失败", "错误信息": str(e)}), 400
+    if frames is not None:
+        # 二进制格式：多帧一起上传，帧名为帧号，直接作为数组参与比对
+        request_data = request.args
+        input_skeletons = SkeletonDataset(pose_wire.packed_frames(frames),
+                                          [{"filename": int(n)} for n in frames.frame_numbers])
+    else:
+        request_data = request.get_json() or {}
+        clip = request_data.get('clip')
+        if isinstance(clip, dict):
+            input_skeletons = sorted(clip.items())  # 按帧名排序，保持录制顺序
+        else:
+            input_skeletons = request_data.get('skeletons')
+        if input_skeletons and isinstance(input_skeletons, list) and \
+                not all(isinstance(skel[1] if isinstance(skel, tuple) else skel, dict) for skel in input_skeletons):
+            return jsonify({"状态": "失败", "错误信息": "骨架数据格式错误"}), 400
+
+    if not input_skeletons or not isinstance(input_skeletons, (list, SkeletonDataset)):
+        return jsonify({"状态": "失败", "错误信息": "未收到骨架数据，请上传 skeletons 数组或 clip"}), 400
+    if len(input_skeletons) > MAX_BATCH_FRAMES:
+        return jsonify({"状态": "失败", "错误信息": f"单次最多上传 {MAX_BATCH_FRAMES} 帧"}), 400
+
+    batch_result, error_msg = action_agent.compare_skeletons(input_skeletons)
+    if error_msg:
+        return jsonify({"状态": "失败", "错误信息": error_msg}), 400
+
+    response = {"状态": "成功", "比对结果": batch_result}
+    best_frame = batch_result["最佳帧"]
+    if best_frame:
+        if request_flag(request_data, 'wait_feedback'):
+            response["AI动作反馈"] = action_agent.generate_feedback(best_frame)
+        elif request_flag(request_data, 'feedback', default=True):
+            response.update(submit_feedback(best_frame, request_data))
+    return jsonify(response)
+
+# 接口2.4：实时姿势流——WebSocket长连接（ws://host:5001/ws/pose-stream），前端按摄像头帧率连续发送骨架，
+# 二进制消息为pose_wire格式，文本消息为JSON骨架；每处理一帧在同一连接上推送一条比对结果。
+# 处理不过来时只处理最新的一帧，旧帧丢弃（前端也会在发送缓冲积压时跳过帧）。
+# 配置了参考动作（ACTION_REFERENCE_ROUTINE）时，推送结果中的"序列对齐"为最近30帧与参考动作的DTW对齐结果，每5帧更新一次
+def stream_message_skeleton(message):
+    """把一条流消息转换为 (帧号, 骨架)，格式错误时抛出ValueError"""
+    if isinstance(message, (bytes, bytearray)):
+        frames = pose_wire.decode_frames(bytes(message))
+        if not len(frames.landmarks):
+            raise ValueError("没有骨架帧")
+        return int(frames.frame_numbers[-1]), pose_wire.packed_frames(frames)[-1]
+    data = json.loads(message)
+    skel = data.get('skeleton', data) if isinstance(data, dict) else None
+    if not isinstance(skel, dict):
+        raise ValueError("骨架数据应为JSON对象")
+    # 关键点应包含数值的x/y/z/visibility，缺少字段时打包骨架会出错
+    for name in LANDMARK_ORDER:
+        point = skel.get(name)
+        if isinstance(point, dict) and not all(isinstance(point.get(field), (int, float))
+                                               and not isinstance(point.get(field), bool) for field in FIELDS):
+            raise ValueError(f"关键点 {name} 应包含数值的 {'/'.join(FIELDS)}")
+    return data.get('frame_number'), skel
+
+sock = Sock(app) if Sock is not None else None
+if sock is not None:
+    @sock.route('/ws/pose-stream')
+    def ws_pose_stream(ws):
+        progress = {"matched": 0, "streak": 0}
+        # 本连接的序列对齐器（未配置参考动作时为None）和最近一次的对齐结果
+        sequence = {"matcher": action_agent.sequence_matcher(), "aligned": None}
+
+        def process(message):
+            try:
+                frame_number, skel = stream_message_skeleton(message)
+            except ValueError as e:
+                return {"类型": "错误", "错误信息": f"骨架数据格式错误：{e}"}
+            match_result, error_msg = action_agent.compare_skeleton(skel)
+            if error_msg:
+                return {"类型": "错误", "错误信息": error_msg}
+            # 进度：累计成功帧数和当前连续成功帧数
+            if match_result["是否匹配成功"]:
+                progress["matched"] += 1
+                progress["streak"] += 1
+            else:
+                progress["streak"] = 0
+            matcher = sequence["matcher"]
+            aligned = matcher.push(skel) if matcher is not None else None
+            if aligned is not None and aligned.start is not None:
+                sequence["aligned"] = {"起始样本": aligned.names[0], "结束样本": aligned.names[-1],
+                                       "平均距离": round(aligned.distance, 4)}
+            return {
+                "类型": "比对结果",
+                "帧号": frame_number,
+                "比对结果": match_result,
+                "成功帧数": progress["matched"],
+                "连续成功帧数": progress["streak"],
+                "序列对齐": sequence["aligned"],
+                "统计": stream.stats()
+            }
+
+        stream = PoseStream(process, lambda result: ws.send(json.dumps(result, ensure_ascii=False)))
+        worker = threading.Thread(target=stream.run, name="pose-stream", daemon=True)
+        worker.start()
+        try:
+            # 接收循环只把消息交给姿势流，不做解析，保证及时读走数据
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+                stream.put(message)
+        finally:
+            stream.close()
+            worker.join(timeout=1.0)
+
+# 接口3：离线评分——对服务器上录制好的一组骨架批量比对（不生成AI反馈）
+@app.route('/api/grade-session', methods=['POST'])
+def api_grade_session():
+    request_data = request.get_json() or {}
+    session_dir = request_data.get('session_dir')  # 录制骨架所在的文件夹（或二进制数据集），相对于SESSION_ROOT
+    if not session_dir or not isinstance(session_dir, str):
+        return jsonify({"状态": "失败", "错误信息": "未指定录制数据的文件夹"}), 400
+
+    grade_result, error_msg = action_agent.grade_session(session_dir)
+    if error_msg:
+        return jsonify({"状态": "失败", "错误信息": error_msg}), 400
+
+    return jsonify({"状态": "成功", "评分结果": grade_result})
 
-# 接口3：测试服务是否正常运行
+# 接口4：测试服务是否正常运行
 @app.route('/api/test', methods=['GET'])
 def api_test():
-    return jsonify({"状态": "成功", "提示": "动作比较智能体服务已启动"})
+    return jsonify({"状态": "成功", "提示": "动作比较智能体服务已启动", "比对统计": action_agent.match_stats(),
+                    "实时姿势流": "/ws/pose-stream" if sock is not None else "未启用（需要安装flask-sock）"})
 if __name__ == "__main__":
-    # 启动时自动加载样本骨架（无需手动调用接口）
-    action_agent.load_samples()
+    # 启动时自动加载样本骨架（无需手动调用接口），并在样本文件变化时自动热更新
+    action_agent.watch_samples()
     # 启动Flask服务（端口5001，避免与chat.py的5000端口冲突）
     app.run(host='0.0.0.0', port=5001, debug=True)
     print("🚀 动作比较智能体服务已启动，端口：5001")
\ No newline at end of file
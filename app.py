@@ -6,6 +6,8 @@ import datetime
 import os
 import threading
 
+import pose_wire  # 骨架数据的二进制传输格式
+
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:*", "http://127.0.0.1:*", "http://192.168.*"])
 
@@ -28,13 +30,24 @@ def receive_pose_data():
     request_count += 1
     
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({"error": "没有接收到数据"}), 400
+        # 按Content-Type选择格式：二进制骨架格式直接在请求体上解码（见pose_wire.py），其他仍按JSON解析
+        frames = None
+        if request.mimetype == pose_wire.CONTENT_TYPE:
+            try:
+                frames = pose_wire.decode_frames(request.get_data())
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            if not len(frames.landmarks):
+                return jsonify({"error": "没有接收到数据"}), 400
+            data = None
+            frame_num = int(frames.frame_numbers[-1])
+        else:
+            data = request.get_json()
+            if not data:
+                return jsonify({"error": "没有接收到数据"}), 400
+            frame_num = data.get('frame_number', '未知')
         
         current_time = datetime.datetime.now().strftime("%H:%M:%S")
-        frame_num = data.get('frame_number', '未知')
         
         # 每50帧输出一次日志，避免过多输出
         if request_count % 50 == 0:
@@ -43,7 +56,12 @@ def receive_pose_data():
         # 异步保存调试数据
         def async_save():
             try:
-                save_debug_data(data, frame_num)
+                if frames is not None:
+                    # 调试数据仍保存为JSON，转换为字典放在后台线程中进行
+                    for i in range(len(frames.landmarks)):
+                        save_debug_data(pose_wire.frame_to_skeleton(frames, i), int(frames.frame_numbers[i]))
+                else:
+                    save_debug_data(data, frame_num)
             except Exception as e:
                 pass  # 忽略保存错误
         
@@ -200,7 +218,7 @@ def index():
         <div class="section">
             <h3>姿势识别端点:</h3>
             <div class="endpoint">
-                <strong>POST /api/pose-data</strong> - 接收姿势数据
+                <strong>POST /api/pose-data</strong> - 接收姿势数据（JSON，或二进制格式 {pose_wire.CONTENT_TYPE}）
             </div>
             <div class="endpoint">
                 <strong>GET /api/test</strong> - 测试连接
@@ -1,62 +1,71 @@
 import cv2
 import time
-import match
 import posemesh
 import os
+from routine_tracker import RoutineTracker
 from flask import Flask,jsonify
 from playsound import playsound
 app=Flask(__name__)
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+#关键动作比对使用的评分方式（见skeleton_library.METRICS注册表）
+METRIC="weighted"
 
 @app.route('api/camread',methods=['GET'])
 def capture_camera_continuously():
     # 打开默认摄像头（通常是0，若有多个摄像头可尝试1、2等）
     cap = cv2.VideoCapture(0)
-    #创建关键动作列表，方便顺序比对
+    #关键动作序列一次性读入内存，由跟踪器按顺序比对（每帧只比对当前和下一个动作，连续达标才推进）
     keymotion_path="./test_files/keymotion"
-    li=[]
-    for items in os.listdir(keymotion_path):
-        if items.endswith('.json'):
-            li.append( os.path.join(keymotion_path,items))
+    tracker=RoutineTracker.from_dir(keymotion_path,threshold=0.25,confirm_frames=2,lookahead=1,metric=METRIC)
     voice_path="./test_files/voices"
     liv=[]
-    for items in os.listdir(voice_path):
+    for items in sorted(os.listdir(voice_path)):
         if items.endswith(".mp3"):
             liv.append(os.path.join(voice_path,items))
     for items in liv:
         print(items)
-    motion_number=0
 
     # 检查摄像头是否成功打开
     if not cap.isOpened():
         print("无法打开摄像头")
         return
     
+    # 从posemesh的共享引擎借出跟踪模式实例，整个摄像头循环复用，不再每帧加载模型
+    # 实时比对只需要粗略的关键姿态：降低推理分辨率、只在人物附近裁剪推理，
+    # 并按每帧100ms的预算自动降低模型复杂度，性能较弱的电脑也能流畅运行
+    # 裁剪区域每帧随人物移动，跟踪模式保存的上一帧ROI会失效，因此使用单图模式逐帧检测
+    region=posemesh.InferenceRegion(max_size=640,roi=True)
     try:
-        while True:
-            # 读取一帧图像
-            ret, frame = cap.read()
+        with posemesh.pose_engine.adaptive(budget_ms=100,static_image_mode=True) as pose:
+            while True:
+                # 读取一帧图像
+                ret, frame = cap.read()
             
-            # 检查是否成功读取帧
-            if not ret:
-                print("无法获取图像帧")
-                break
+                # 检查是否成功读取帧
+                if not ret:
+                    print("无法获取图像帧")
+                    break
 
             
-            # 保存图像到根目录，覆盖之前的文件,并处理得到骨架，将骨架与关键动作骨架配对
-            cv2.imwrite("./caminput/camera_capture.jpg", frame)
-            skeleton=posemesh.process_camera(frame,"./caminput/processed.json")
-            if match.motion_match_or_not(li[motion_number],skeleton):
-                playsound(liv[motion_number])
-                print(f"匹配成功\033[31m{li[motion_number]}\033[0m")
-                motion_number=motion_number+1
-                #print(li[motion_number])
+                # 保存图像到根目录，覆盖之前的文件,并处理得到骨架，将骨架与关键动作骨架配对
+                cv2.imwrite("./caminput/camera_capture.jpg", frame)
+                skeleton=posemesh.process_camera(frame,"./caminput/processed.json",pose=pose,region=region)
+                for event in tracker.update(skeleton):
+                    if event.kind=="matched":
+                        playsound(liv[event.index])
+                        print(f"匹配成功\033[31m{event.name}\033[0m")
+                    elif event.kind=="skipped":
+                        print(f"跳过动作 {event.name}")
+                    elif event.kind=="finished":
+                        print("全部动作已完成")
+                if tracker.finished:
+                    break
             
                 
 
-            # 等待0.5秒
-            time.sleep(0.5)
+                # 等待0.5秒
+                time.sleep(0.5)
             
     except KeyboardInterrupt:
         print("\n程序已手动终止")
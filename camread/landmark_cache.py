@@ -0,0 +1,130 @@
+#关键点检测结果的本地缓存：以输入图像内容的哈希加模型参数为键，把检测结果保存在SQLite中，
+#重复处理相同的视频/图片时直接读取缓存，跳过MediaPipe推理；超出容量上限时按最近最少使用淘汰
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+class LandmarkCache:
+    """
+    内容寻址的关键点结果缓存（SQLite存储，可被多个进程同时使用）
+    键：图像内容哈希 + 形状 + 模型参数（复杂度、置信度等）
+    值：序列化后的检测结果字节串，空字节串表示"未检测到人体"
+    max_bytes: 缓存值的总大小上限，超出时按最后使用时间淘汰到上限的90%
+    touch_batch: 命中时的最后使用时间先记在内存中，攒够这么多条（或写入、淘汰、关闭时）再一起写入数据库，
+                 命中不再每次都提交事务
+    """
+    def __init__(self, path="./landmark_cache.sqlite", max_bytes=256 * 1024 * 1024, touch_batch=256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_batch = touch_batch
+        self._touched = {}  # 键 -> 尚未写入数据库的最后使用时间
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL模式下并行处理的多个进程可以同时读写
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS landmarks ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS landmarks_last_used ON landmarks (last_used)")
+        self._conn.commit()
+        self._bytes = self._total_bytes()
+
+    @staticmethod
+    def make_key(image, params) -> str:
+        """由图像内容（numpy数组）和模型参数生成缓存键"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((image.shape, str(image.dtype), params)).encode('utf-8'))
+        digest.update(memoryview(image).cast('B') if image.flags['C_CONTIGUOUS'] else image.tobytes())
+        return digest.hexdigest()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM landmarks").fetchone()[0]
+
+    def get(self, key: str):
+        """读取缓存，未命中返回None"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM landmarks WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touched()
+                self._conn.commit()
+            return bytes(row[0])
+
+    def _flush_touched(self):
+        # 把攒下的最后使用时间写入数据库（由调用方提交）
+        if self._touched:
+            self._conn.executemany("UPDATE landmarks SET last_used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def put(self, key: str, value: bytes):
+        """写入缓存，超出容量上限时淘汰最久未使用的条目"""
+        with self._lock:
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO landmarks (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()))
+            self._conn.commit()
+            self._bytes += len(value)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # 其他进程也可能写入，淘汰前重新统计实际大小
+        self._bytes = self._total_bytes()
+        target = int(self.max_bytes * 0.9)
+        if self._bytes <= target:
+            return
+        freed = 0
+        keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM landmarks ORDER BY last_used"):
+            keys.append((key,))
+            freed += size
+            if self._bytes - freed <= target:
+                break
+        self._conn.executemany("DELETE FROM landmarks WHERE key = ?", keys)
+        self._conn.commit()
+        self._bytes -= freed
+        self.evictions += len(keys)
+
+    def stats(self) -> dict:
+        """命中/未命中统计和当前缓存大小"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM landmarks").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self._bytes
+            }
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM landmarks")
+            self._conn.commit()
+            self._bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
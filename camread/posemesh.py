@@ -4,7 +4,19 @@ import mediapipe as mp
 import numpy as np
 import json
 import os
+import time
+import hashlib
+import queue
+import threading
+import multiprocessing
+import multiprocessing.util
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import timedelta
+from mediapipe.framework.formats import landmark_pb2
+
+from landmark_cache import LandmarkCache
 
 # 初始化MediaPipe组件
 mp_pose = mp.solutions.pose
@@ -95,35 +107,425 @@ def draw_filtered_landmarks(image, landmarks, connections):
     
     return image
 
-def detect_pose_with_reduced_head(image, output_path=None):
-    """处理图像，使用精简后的头部节点"""
+class PoseEngine:
+    """
+    常驻的姿态检测引擎：按(模式, 模型复杂度, 置信度)缓存MediaPipe Pose实例，
+    避免每帧都重新加载模型和初始化计算图
+    Pose实例本身不是线程安全的，因此每次借出都是独占的，用完归还到池中
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}      # key -> 空闲的Pose实例列表
+        self._created = 0    # 累计创建的实例数量（用于观察池是否生效）
+
+    @staticmethod
+    def make_key(static_image_mode=True, model_complexity=2,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        """池的键：(模式, 模型复杂度, 检测置信度, 跟踪置信度)"""
+        mode = "image" if static_image_mode else "tracking"
+        return (mode, int(model_complexity),
+                round(float(min_detection_confidence), 3),
+                round(float(min_tracking_confidence), 3))
+
+    def _create(self, key):
+        mode, complexity, det_conf, track_conf = key
+        with self._lock:
+            self._created += 1
+        return mp_pose.Pose(
+            static_image_mode=(mode == "image"),
+            model_complexity=complexity,
+            min_detection_confidence=det_conf,
+            min_tracking_confidence=track_conf)
+
+    @contextmanager
+    def acquire(self, static_image_mode=True, model_complexity=2,
+                min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        """
+        借出一个预热好的Pose实例
+        static_image_mode=True: 单张图片模式（每帧独立检测）
+        static_image_mode=False: 跟踪模式（视频/摄像头连续帧，利用上一帧结果加速）
+        """
+        key = self.make_key(static_image_mode, model_complexity,
+                            min_detection_confidence, min_tracking_confidence)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            pose = idle.pop() if idle else None
+        # 模型加载较慢，放在锁外进行，避免阻塞其他线程归还/借出
+        if pose is None:
+            pose = self._create(key)
+        try:
+            yield pose
+        finally:
+            # 跟踪模式的实例带有上一段视频的状态，归还前先重置
+            if key[0] == "tracking":
+                pose.reset()
+            with self._lock:
+                self._idle[key].append(pose)
+
+    def adaptive(self, budget_ms, static_image_mode=False, max_complexity=2, min_complexity=0,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5, window=10):
+        """按每帧延迟预算自适应选择模型复杂度的检测器（见AdaptivePose）"""
+        return AdaptivePose(self, budget_ms, static_image_mode, max_complexity, min_complexity,
+                            min_detection_confidence, min_tracking_confidence, window)
+
+    def stats(self):
+        """返回池的状态：累计创建数量和各键下的空闲实例数"""
+        with self._lock:
+            return {
+                "created": self._created,
+                "idle": {key: len(poses) for key, poses in self._idle.items()}
+            }
+
+    def close(self):
+        """释放所有空闲的Pose实例"""
+        with self._lock:
+            for poses in self._idle.values():
+                for pose in poses:
+                    pose.close()
+            self._idle.clear()
+
+
+class AdaptivePose:
+    """
+    延迟预算自适应的检测器，可以代替Pose实例传给detect_pose_with_reduced_head / process_camera
+    统计最近window帧的平均推理耗时：超出预算时降低模型复杂度（2 -> 1 -> 0），
+    耗时远低于预算时再逐级恢复；每次切换后要积累满一个窗口才会再次调整
+    last_complexity记录最近一帧实际使用的模型复杂度
+    离线提取参考动作时不使用它，保持固定的model_complexity=2
+    """
+    # 平均耗时低于预算的这个比例时才升级（更高的复杂度耗时会成倍增加）
+    UPGRADE_RATIO = 0.4
+
+    def __init__(self, engine, budget_ms, static_image_mode=False, max_complexity=2,
+                 min_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 window=10):
+        self.engine = engine
+        self.budget_ms = budget_ms
+        self.static_image_mode = static_image_mode
+        self.max_complexity = max_complexity
+        self.min_complexity = min_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.complexity = max_complexity
+        self.last_complexity = None
+        self._times = deque(maxlen=window)
+        self._ctx = None
+        self._pose = None
+
+    def _switch(self, complexity):
+        """归还当前实例，从引擎借出对应复杂度的实例"""
+        self.close()
+        self.complexity = complexity
+        self._times.clear()
+        self._ctx = self.engine.acquire(self.static_image_mode, complexity,
+                                        self.min_detection_confidence,
+                                        self.min_tracking_confidence)
+        self._pose = self._ctx.__enter__()
+
+    def process(self, image_rgb):
+        """与Pose.process相同的接口，同时记录耗时并按预算调整复杂度"""
+        if self._pose is None:
+            self._switch(self.complexity)
+        start = time.perf_counter()
+        results = self._pose.process(image_rgb)
+        self._times.append((time.perf_counter() - start) * 1000)
+        self.last_complexity = self.complexity
+        self._adjust()
+        return results
+
+    def cache_params(self):
+        """当前复杂度对应的模型参数，作为关键点缓存键的一部分"""
+        return PoseEngine.make_key(self.static_image_mode, self.complexity,
+                                   self.min_detection_confidence, self.min_tracking_confidence)
+
+    def rolling_ms(self):
+        """最近窗口内的平均推理耗时（毫秒）"""
+        return sum(self._times) / len(self._times) if self._times else 0.0
+
+    def _adjust(self):
+        if len(self._times) < self._times.maxlen:
+            return
+        average = self.rolling_ms()
+        if average > self.budget_ms and self.complexity > self.min_complexity:
+            print(f"平均推理耗时 {average:.0f}ms 超出预算 {self.budget_ms}ms，模型复杂度降为 {self.complexity - 1}")
+            self._switch(self.complexity - 1)
+        elif average < self.budget_ms * self.UPGRADE_RATIO and self.complexity < self.max_complexity:
+            print(f"平均推理耗时 {average:.0f}ms，模型复杂度升为 {self.complexity + 1}")
+            self._switch(self.complexity + 1)
+
+    def reset(self):
+        """清除当前实例的跟踪状态"""
+        if self._pose is not None:
+            self._pose.reset()
+
+    def close(self):
+        """归还当前借出的实例"""
+        if self._ctx is not None:
+            self._ctx.__exit__(None, None, None)
+            self._ctx = None
+            self._pose = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# 模块级共享引擎，process_video / process_camera / camread 循环都从这里取实例
+pose_engine = PoseEngine()
+
+# 缓存命中时返回的结果，只包含后续处理用到的pose_landmarks
+CachedResults = namedtuple("CachedResults", ["pose_landmarks"])
+
+class CachedPose:
+    """
+    带关键点缓存的检测器，可以代替Pose实例使用
+    推理前先以输入图像内容和模型参数查询LandmarkCache，命中则直接返回缓存的关键点
+    params: 模型参数（通常为PoseEngine.make_key的结果）；为None时取pose.cache_params()（如AdaptivePose）
+    """
+    def __init__(self, cache, pose, params=None):
+        self.cache = cache
+        self.pose = pose
+        self.params = params
+
+    def process(self, image_rgb):
+        params = self.params if self.params is not None else self.pose.cache_params()
+        key = self.cache.make_key(image_rgb, params)
+        value = self.cache.get(key)
+        if value is not None:
+            landmarks = landmark_pb2.NormalizedLandmarkList.FromString(value) if value else None
+            return CachedResults(landmarks)
+        results = self.pose.process(image_rgb)
+        self.cache.put(key, results.pose_landmarks.SerializeToString() if results.pose_landmarks else b'')
+        return results
+
+    def reset(self):
+        self.pose.reset()
+
+def open_landmark_cache(cache):
+    """cache可以是LandmarkCache实例或缓存文件路径；返回 (缓存实例或None, 是否需要由调用方关闭)"""
+    if cache is None or isinstance(cache, LandmarkCache):
+        return cache, False
+    return LandmarkCache(cache), True
+
+def print_cache_stats(hits, misses):
+    lookups = hits + misses
+    if lookups:
+        print(f"关键点缓存: 命中 {hits} 次，未命中 {misses} 次，命中率 {hits / lookups * 100:.1f}%")
+
+class InferenceRegion:
+    """
+    控制送入pose.process的图像区域和分辨率，降低每帧的推理开销：
+    max_size: 推理分辨率（长边像素），更大的图像先等比缩小再推理，None为原分辨率
+    roi: 跟踪ROI模式，在上一帧关键点包围框（四周扩展margin）内裁剪，
+         相邻帧人物位置变化很小；裁剪区域内检测失败时回退到整帧
+    输出的关键点始终换算回整帧的归一化坐标，骨架数据格式不变
+    每个视频/摄像头会话使用一个独立的实例（保存了上一帧的包围框）
+    跟踪模式的Pose把上一帧的ROI保存为上一次输入图像内的归一化坐标，裁剪区域一变这个状态就失效，
+    因此裁剪区域与上一次推理不同时（包括回退到整帧）先重置pose的跟踪状态；
+    ROI每帧都会移动，开启roi时使用单图模式（static_image_mode=True）的Pose更合适
+    """
+    FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+
+    def __init__(self, max_size=None, roi=False, margin=0.25, min_roi=0.3):
+        self.max_size = max_size
+        self.roi = roi
+        self.margin = margin
+        self.min_roi = min_roi      # ROI的最小边长（占整帧的比例），避免裁得过小
+        self.prev_box = None        # 上一帧的归一化包围框 (x0, y0, x1, y1)
+        self.last_box = None        # 上一次送入pose.process的裁剪区域
+
+    def reset(self):
+        self.prev_box = None
+        self.last_box = None
+
+    def process(self, pose, image_rgb):
+        """在选定区域上运行pose.process，返回坐标已换算回整帧的结果"""
+        box = self.prev_box if (self.roi and self.prev_box) else self.FULL_FRAME
+        results = self._run(pose, image_rgb, box)
+        if not results.pose_landmarks and box != self.FULL_FRAME:
+            results = self._run(pose, image_rgb, self.FULL_FRAME)
+        if self.roi:
+            self.prev_box = self._next_box(results.pose_landmarks)
+        return results
+
+    def _run(self, pose, image_rgb, box):
+        if box != self.last_box:
+            # 裁剪区域变化后上一帧的跟踪状态不再对应当前输入，重新检测
+            if self.last_box is not None:
+                pose.reset()
+            self.last_box = box
+        height, width = image_rgb.shape[:2]
+        x0, y0 = int(box[0] * width), int(box[1] * height)
+        x1, y1 = int(round(box[2] * width)), int(round(box[3] * height))
+        crop = image_rgb[y0:y1, x0:x1]
+        crop_h, crop_w = crop.shape[:2]
+        
+        # 等比缩小到推理分辨率（归一化坐标不受缩放影响）
+        if self.max_size and max(crop_h, crop_w) > self.max_size:
+            scale = self.max_size / max(crop_h, crop_w)
+            crop = cv2.resize(crop, (max(1, int(crop_w * scale)), max(1, int(crop_h * scale))),
+                              interpolation=cv2.INTER_AREA)
+        results = pose.process(np.ascontiguousarray(crop))
+        
+        # 把裁剪区域内的归一化坐标换算回整帧（z与x使用相同的尺度）
+        if results.pose_landmarks and (crop_w, crop_h) != (width, height):
+            for landmark in results.pose_landmarks.landmark:
+                landmark.x = (landmark.x * crop_w + x0) / width
+                landmark.y = (landmark.y * crop_h + y0) / height
+                landmark.z = landmark.z * crop_w / width
+        return results
+
+    def _next_box(self, landmarks):
+        """由本帧关键点计算下一帧的ROI，未检测到人体时返回None（下一帧用整帧）"""
+        if not landmarks:
+            return None
+        xs = [landmark.x for landmark in landmarks.landmark]
+        ys = [landmark.y for landmark in landmarks.landmark]
+        x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+        # 四周扩展margin，并保证最小边长
+        half_w = max((x1 - x0) * (1 + 2 * self.margin), self.min_roi) / 2
+        half_h = max((y1 - y0) * (1 + 2 * self.margin), self.min_roi) / 2
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        box = (max(0.0, cx - half_w), max(0.0, cy - half_h),
+               min(1.0, cx + half_w), min(1.0, cy + half_h))
+        if box[2] - box[0] <= 0 or box[3] - box[1] <= 0:
+            return None
+        return box
+
+def detect_pose_with_reduced_head(image, output_path=None, pose=None, annotator=None, region=None):
+    """
+    处理图像，使用精简后的头部节点
+    pose: 调用方已借出的Pose实例（如视频跟踪模式）；为None时从pose_engine借一个单图模式实例
+    annotator: AnnotationWriter后台标注写入器；给出时绘制和编码都交给后台线程，
+               为None时沿用在当前线程绘制并保存output_path的方式
+    region: InferenceRegion，控制推理分辨率和跟踪ROI；为None时整帧原分辨率推理
+    """
     if image is None:
         print("无效的图像数据")
         return False, None
     
     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     
-    with mp_pose.Pose(
-        static_image_mode=True,
-        model_complexity=2,
-        min_detection_confidence=0.5) as pose:
-        
-        results = pose.process(image_rgb)
+    if pose is None:
+        with pose_engine.acquire(static_image_mode=True) as pose:
+            results = region.process(pose, image_rgb) if region else pose.process(image_rgb)
+    else:
+        results = region.process(pose, image_rgb) if region else pose.process(image_rgb)
+    
+    if annotator is not None:
+        annotator.submit(image, results.pose_landmarks, output_path)
+        return True, results.pose_landmarks
+    
+    if results.pose_landmarks:
+        # 绘制过滤后的骨架
+        image = draw_filtered_landmarks(
+            image, 
+            results.pose_landmarks, 
+            REDUCED_CONNECTIONS
+        )
+    
+    if output_path:
+        cv2.imwrite(output_path, image)
+        #print(f"处理后的图像已保存至: {output_path}")
+    return True, results.pose_landmarks
+
+# 标注图像的输出方式：
+#   jpeg      每个截取帧保存一张原尺寸标注图片（原有方式）
+#   thumbnail 每个截取帧保存一张缩小的标注图片
+#   video     每次运行把所有标注帧编码为一个MP4
+#   none      不输出图像
+ANNOTATION_MODES = ("jpeg", "thumbnail", "video", "none")
+
+class AnnotationWriter:
+    """
+    后台标注写入器：推理线程只把图像和关键点放入有界队列，
+    绘制骨架、缩放和编码写盘都在后台线程完成，推理不再等待磁盘
+    队列满时默认阻塞推理，保证每一帧标注都写出；只有缩略图预览可以设置drop_when_full=True，
+    队列满时丢弃新的标注帧（记录在dropped中）
+    """
+    def __init__(self, mode="jpeg", output_folder=".", fps=2.0, thumbnail_width=320,
+                 video_name="annotated.mp4", max_pending=16, drop_when_full=False):
+        if mode not in ANNOTATION_MODES:
+            raise ValueError(f"不支持的标注输出方式: {mode}，可选: {ANNOTATION_MODES}")
+        if drop_when_full and mode != "thumbnail":
+            # jpeg和video是完整的参考输出，不能缺帧
+            raise ValueError(f"只有thumbnail方式可以丢弃标注帧，当前方式: {mode}")
+        self.mode = mode
+        self.fps = fps
+        self.thumbnail_width = thumbnail_width
+        self.video_path = os.path.join(output_folder, video_name)
+        self.drop_when_full = drop_when_full
+        self.written = 0
+        self.dropped = 0
+        self._video = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        if mode != "none":
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def submit(self, image, landmarks, output_path=None):
+        """提交一帧待标注的图像（image的所有权交给写入器，调用方不应再修改）"""
+        if self._thread is None:
+            return
+        if self.drop_when_full:
+            try:
+                self._queue.put_nowait((image, landmarks, output_path))
+            except queue.Full:
+                self.dropped += 1
+        else:
+            self._queue.put((image, landmarks, output_path))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+                self.written += 1
+            except Exception as e:
+                print(f"写入标注图像失败: {e}")
+        if self._video is not None:
+            self._video.release()
+
+    def _write(self, image, landmarks, output_path):
+        if landmarks:
+            image = draw_filtered_landmarks(image, landmarks, REDUCED_CONNECTIONS)
         
-        if results.pose_landmarks:
-            # 绘制过滤后的骨架
-            image = draw_filtered_landmarks(
-                image, 
-                results.pose_landmarks, 
-                REDUCED_CONNECTIONS
-            )
+        if self.mode == "video":
+            if self._video is None:
+                height, width = image.shape[:2]
+                self._video = cv2.VideoWriter(
+                    self.video_path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (width, height))
+            self._video.write(image)
+            return
         
-        if output_path:
-            cv2.imwrite(output_path, image)
-            #print(f"处理后的图像已保存至: {output_path}")
-            return True, results.pose_landmarks
-        else:
-            return True, results.pose_landmarks
+        if not output_path:
+            return
+        if self.mode == "thumbnail":
+            height, width = image.shape[:2]
+            if width > self.thumbnail_width:
+                scale = self.thumbnail_width / width
+                image = cv2.resize(image, (self.thumbnail_width, int(height * scale)),
+                                   interpolation=cv2.INTER_AREA)
+        cv2.imwrite(output_path, image)
+
+    def close(self):
+        """等待队列中的标注帧全部写完（视频模式下同时结束MP4文件）"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.dropped:
+            print(f"标注队列已满，丢弃了 {self.dropped} 帧标注图像")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 def get_universal_skeleton_coords(landmarks):
     """从landmarks获取人体骨架的通用标准化坐标"""
@@ -165,20 +567,11 @@ def add_tag_to_json_data(file_path, tags):
 
 
 
-def generate_waist_node(input_file, output_file):
+def compute_waist_node(data):
     """
-    读取输入JSON文件中的左肩、右肩、左髋、右髋坐标，
-    以0.66, 0.66, 0.33, 0.33的权重计算新的腰部节点，
-    并将结果保存到输出文件中
-    
-    参数:
-        input_file: 输入JSON文件路径
-        output_file: 输出JSON文件路径
+    以0.66, 0.66, 0.33, 0.33的权重对左肩、右肩、左髋、右髋加权，
+    在内存中计算腰部节点（可见度取四个节点的平均值）
     """
-    # 读取输入文件
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-    
     # 提取所需节点的坐标
     nodes = ['left_shoulder', 'right_shoulder', 'left_hip', 'right_hip']
     weights = [0.66, 0.66, 0.33, 0.33]
@@ -194,35 +587,214 @@ def generate_waist_node(input_file, output_file):
     # 计算可见度（取四个节点可见度的平均值）
     waist_visibility = sum(data[node]['visibility'] for node in nodes) / len(nodes)
     
-    # 添加腰部节点到数据中
-    data['waist'] = {
+    return {
         'x': waist_x,
         'y': waist_y,
         'z': waist_z,
         'visibility': waist_visibility
     }
+
+def generate_waist_node(input_file, output_file):
+    """
+    读取输入JSON文件中的左肩、右肩、左髋、右髋坐标，
+    以0.66, 0.66, 0.33, 0.33的权重计算新的腰部节点，
+    并将结果保存到输出文件中
+    
+    参数:
+        input_file: 输入JSON文件路径
+        output_file: 输出JSON文件路径
+    """
+    # 读取输入文件
+    with open(input_file, 'r') as f:
+        data = json.load(f)
+    
+    # 添加腰部节点到数据中
+    data['waist'] = compute_waist_node(data)
     
     # 保存到输出文件
     with open(output_file, 'w') as f:
         json.dump(data, f, indent=2)
 
+def build_skeleton_record(skeleton_data, tags):
+    """
+    一次性组装完整的骨架记录：关键点 + 腰部节点 + 标签
+    字段顺序与"保存 -> generate_waist_node -> add_tag_to_json_data"的结果一致
+    """
+    record = dict(skeleton_data)
+    record['waist'] = compute_waist_node(skeleton_data)
+    record.update(tags)
+    return record
+
+# JSON输出格式：pretty与原有文件逐字节一致，compact去掉缩进和空格
+JSON_FORMATS = {
+    "pretty": {"indent": 2},
+    "compact": {"separators": (',', ':')},
+}
+
+def write_skeleton_record(record, output_path, json_format="pretty"):
+    """将组装好的骨架记录一次写入JSON文件"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False, **JSON_FORMATS[json_format])
+
+class SkeletonWriter:
+    """
+    后台批量写入骨架JSON：检测线程只负责把记录放入队列，
+    写线程每次取出一批记录集中写盘，避免推理线程等待磁盘
+    """
+    def __init__(self, json_format="pretty", batch_size=32, max_pending=256):
+        if json_format not in JSON_FORMATS:
+            raise ValueError(f"不支持的JSON格式: {json_format}，可选: {list(JSON_FORMATS)}")
+        self.json_format = json_format
+        self.batch_size = batch_size
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
 
+    def submit(self, record, output_path):
+        """提交一条记录（队列满时阻塞，防止内存无限增长）"""
+        self._queue.put((record, output_path))
 
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # 尽量多取一些已排队的记录，合并为一批写入
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                if item is None:
+                    return
+                record, output_path = item
+                try:
+                    write_skeleton_record(record, output_path, self.json_format)
+                    self.written += 1
+                except Exception as e:
+                    print(f"写入骨架数据失败 {output_path}: {e}")
 
+    def close(self):
+        """等待队列中的记录全部写完后结束写线程"""
+        self._queue.put(None)
+        self._thread.join()
 
-def save_skeleton_data(skeleton_data, output_path):
-    """将骨架坐标数据保存为JSON文件"""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(skeleton_data, f, ensure_ascii=False, indent=4)
-    #print(f"骨架坐标数据已保存至: {output_path}")
+    def __enter__(self):
+        return self
 
-def process_video(video_path, output_folder, interval=15):
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def process_sampled_frame(frame, frame_count, extract_count, fps, output_folder, pose,
+                          writer=None, json_format="pretty", frame_time=None, annotator=None,
+                          region=None):
+    """
+    处理一个截取帧：检测姿态，保存标注图片和带标签的骨架JSON
+    frame_count: 帧在视频中的帧号
+    extract_count: 截取序号（决定输出文件名 frame_XXXX）
+    writer: SkeletonWriter后台写入器；为None时在当前线程直接写入
+    frame_time: 帧的实际时间戳（秒），为None时按frame_count / fps计算
+    annotator: AnnotationWriter后台标注写入器；为None时在当前线程保存原尺寸标注图片
+    region: InferenceRegion，控制推理分辨率和跟踪ROI
+    返回是否得到了骨架数据
+    """
+    # 生成输出文件名
+    img_filename = f"frame_{extract_count:04d}.jpg"
+    img_path = os.path.join(output_folder, img_filename)
+    json_path = os.path.join(output_folder, f"frame_{extract_count:04d}.json")
+    
+    # 计算当前帧在视频中的时间（秒）
+    if frame_time is None:
+        frame_time = frame_count / fps
+    # 转换为时分秒格式
+    time_str = str(timedelta(seconds=frame_time))
+    
+    print(f"\n处理第{extract_count}个截取帧 (帧号: {frame_count}, 时间: {time_str})")
+    
+    # 处理帧并检测姿态
+    success, landmarks = detect_pose_with_reduced_head(frame.copy(), img_path, pose=pose,
+                                                       annotator=annotator, region=region)
+    if success and landmarks:
+        # 获取骨架数据
+        skeleton_data = get_universal_skeleton_coords(landmarks)
+        if skeleton_data:
+            # 在内存中组装腰部节点和标签（包括时间信息），每帧只写一次文件
+            record = build_skeleton_record(skeleton_data, {
+                "type": "video_frame",
+                "frame_number": frame_count,
+                "time_seconds": round(frame_time, 3),
+                "time_format": time_str
+            })
+            if writer is not None:
+                writer.submit(record, json_path)
+            else:
+                write_skeleton_record(record, json_path, json_format)
+            return True
+    return False
+
+def iter_sampled_frames(cap, interval=15, interval_ms=None, start_frame=0, end_frame=None,
+                        total_frames=0):
+    """
+    稀疏解码视频：每一帧只用grab()前进，只有要分析的帧才retrieve()解码
+    interval: 按帧数截取，每interval帧取一帧
+    interval_ms: 按时间截取（毫秒），以帧的实际时间戳为准，可变帧率的视频也能均匀取样
+    start_frame / end_frame: 处理的帧范围[start_frame, end_frame)，end_frame为None时读到结尾
+    total_frames: 大于0时每100帧打印一次进度
+    逐个产出 (帧号, 时间戳秒数或None, 图像)；按帧数截取时时间戳为None，由调用方按fps计算
+    """
+    frame_count = start_frame
+    next_sample_ms = 0.0
+    while end_frame is None or frame_count < end_frame:
+        if not cap.grab():
+            break  # 视频读取完毕
+        
+        frame_time = None
+        if interval_ms:
+            # 时间戳取grab之后当前帧的位置
+            pos_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            sampled = pos_ms >= next_sample_ms
+            if sampled:
+                frame_time = pos_ms / 1000.0
+                while next_sample_ms <= pos_ms:
+                    next_sample_ms += interval_ms
+        else:
+            sampled = frame_count % interval == 0
+        
+        if sampled:
+            ret, frame = cap.retrieve()
+            if ret:
+                yield frame_count, frame_time, frame
+        
+        frame_count += 1
+        # 显示进度
+        if total_frames > 0 and frame_count % 100 == 0:
+            progress = (frame_count / total_frames) * 100
+            print(f"处理进度: {progress:.1f}%")
+
+def process_video(video_path, output_folder, interval=15, workers=1, json_format="pretty",
+                  interval_ms=None, annotate="jpeg", inference_size=None, roi=False, cache=None):
     """
     处理视频文件，每interval帧截取一次动作
     video_path: 输入视频路径
     output_folder: 输出文件夹
     interval: 截取间隔（帧数）
+    workers: 并行进程数，大于1时按帧范围切分视频并行处理（见process_video_parallel）
+    json_format: 骨架JSON格式，"pretty"（缩进，与原有文件一致）或"compact"
+    interval_ms: 按时间截取的间隔（毫秒），设置后忽略interval，适用于可变帧率的视频
+    annotate: 标注图像输出方式，见ANNOTATION_MODES（jpeg / thumbnail / video / none）
+    inference_size: 推理分辨率（长边像素），None为原分辨率
+    roi: 是否开启跟踪ROI，在上一个截取帧的人物包围框附近裁剪后推理
+    cache: 关键点缓存（LandmarkCache实例或缓存文件路径），重复处理相同视频时跳过推理
+    返回截取的帧数
     """
+    if workers and workers > 1:
+        if interval_ms:
+            # 按时间截取时序号依赖前面的帧，无法按帧范围切分
+            print("按时间截取不支持并行处理，改为串行处理")
+        else:
+            return process_video_parallel(video_path, output_folder, interval, workers,
+                                          json_format, annotate, inference_size, roi, cache)
+    
     # 创建输出文件夹
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
@@ -232,7 +804,7 @@ def process_video(video_path, output_folder, interval=15):
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         print(f"无法打开视频文件: {video_path}")
-        return
+        return 0
     
     # 获取视频基本信息
     fps = cap.get(cv2.CAP_PROP_FPS)
@@ -240,75 +812,384 @@ def process_video(video_path, output_folder, interval=15):
     duration = total_frames / fps if fps > 0 else 0
     print(f"视频信息: FPS={fps:.2f}, 总帧数={total_frames}, 时长={duration:.2f}秒")
     
-    frame_count = 0
     extract_count = 0
+    region = InferenceRegion(inference_size, roi)
+    cache, close_cache = open_landmark_cache(cache)
+    # 标注视频的帧率与截取频率一致
+    sample_fps = 1000.0 / interval_ms if interval_ms else (fps / interval if fps > 0 else 1.0)
     
-    with mp_pose.Pose(
+    # 从引擎借出跟踪模式实例，整个视频复用同一个（连续帧共享跟踪状态）
+    # 骨架JSON和标注图像分别交给后台写入器写盘
+    with pose_engine.acquire(
         static_image_mode=False,  # 视频模式
         model_complexity=2,
         min_detection_confidence=0.5,
-        min_tracking_confidence=0.5) as pose:
+        min_tracking_confidence=0.5) as pose, SkeletonWriter(json_format) as writer, \
+            AnnotationWriter(annotate, output_folder, fps=sample_fps) as annotator:
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break  # 视频读取完毕
-            
-            # 每interval帧处理一次
-            if frame_count % interval == 0:
-                extract_count += 1
-                # 生成输出文件名
-                img_filename = f"frame_{extract_count:04d}.jpg"
-                img_path = os.path.join(output_folder, img_filename)
-                json_path = os.path.join(output_folder, f"frame_{extract_count:04d}.json")
-                
-                # 计算当前帧在视频中的时间（秒）
-                frame_time = frame_count / fps
-                # 转换为时分秒格式
-                time_str = str(timedelta(seconds=frame_time))
-                
-                print(f"\n处理第{extract_count}个截取帧 (帧号: {frame_count}, 时间: {time_str})")
-                
-                # 处理帧并检测姿态
-                success, landmarks = detect_pose_with_reduced_head(frame.copy(), img_path)
-                if success and landmarks:
-                    # 获取骨架数据
-                    skeleton_data = get_universal_skeleton_coords(landmarks)
-                    if skeleton_data:
-                        # 保存骨架数据
-                        save_skeleton_data(skeleton_data, json_path)
-                        # 添加标签（包括时间信息，腰部节点）
-                        generate_waist_node(json_path,json_path)
-                        add_tag_to_json_data(json_path, {
-                            "type": "video_frame",
-                            "frame_number": frame_count,
-                            "time_seconds": round(frame_time, 3),
-                            "time_format": time_str
-                        })
-            
-            frame_count += 1
-            # 显示进度
-            if frame_count % 100 == 0:
-                progress = (frame_count / total_frames) * 100
-                print(f"处理进度: {progress:.1f}%")
+        # 先查询关键点缓存，未命中才推理
+        if cache is not None:
+            pose = CachedPose(cache, pose, PoseEngine.make_key(False, 2, 0.5, 0.5))
+        
+        # 只解码需要分析的帧
+        for frame_count, frame_time, frame in iter_sampled_frames(
+                cap, interval, interval_ms, total_frames=total_frames):
+            extract_count += 1
+            process_sampled_frame(frame, frame_count, extract_count, fps, output_folder, pose,
+                                  writer, frame_time=frame_time, annotator=annotator,
+                                  region=region)
     
     cap.release()
+    if cache is not None:
+        print_cache_stats(cache.hits, cache.misses)
+        if close_cache:
+            cache.close()
     print(f"\n视频处理完成，共截取 {extract_count} 帧")
     print(f"结果保存至: {output_folder}")
+    return extract_count
 
-def process_camera(camera_path, output_folder):
-    success, landmarks = detect_pose_with_reduced_head(camera_path)
-    if success and landmarks:
-         # 获取骨架数据
-        skeleton_data = get_universal_skeleton_coords(landmarks)
-        if skeleton_data:
-             # 保存骨架数据
-             return skeleton_data
-            #save_skeleton_data(skeleton_data, output_folder)
+def benchmark_decode(video_path, interval=15, interval_ms=None):
+    """
+    对比逐帧read()与grab()/retrieve()稀疏解码遍历同一视频的耗时（不做姿态检测），
+    打印并返回节省的解码时间
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"无法打开视频文件: {video_path}")
+        return None
+    start = time.perf_counter()
+    frame_count = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_count += 1
+    full_time = time.perf_counter() - start
+    cap.release()
+    
+    cap = cv2.VideoCapture(video_path)
+    start = time.perf_counter()
+    sampled = sum(1 for _ in iter_sampled_frames(cap, interval, interval_ms))
+    sparse_time = time.perf_counter() - start
+    cap.release()
+    
+    saved = full_time - sparse_time
+    print(f"逐帧解码: {frame_count}帧 {full_time:.2f}秒；稀疏解码: 取样{sampled}帧 {sparse_time:.2f}秒；"
+          f"节省 {saved:.2f}秒 ({saved / full_time * 100 if full_time > 0 else 0:.1f}%)")
+    return {"frames": frame_count, "sampled": sampled, "full_seconds": full_time,
+            "sparse_seconds": sparse_time, "saved_seconds": saved}
+
+# ----------------------
+# 多进程并行处理视频
+# ----------------------
+def split_frame_ranges(total_frames, interval, workers):
+    """
+    按截取帧数把视频均匀切分为workers个帧范围[start, end)，
+    每个范围的起点都落在截取点上，保证截取序号与串行处理完全一致
+    最后一个范围的end为None，表示读到视频结尾（帧数统计可能不准）
+    """
+    sample_total = max(1, -(-total_frames // interval))  # 向上取整
+    workers = max(1, min(workers, sample_total))
+    per_worker = -(-sample_total // workers)
+    ranges = []
+    for i in range(workers):
+        start_sample = i * per_worker
+        if start_sample >= sample_total:
+            break
+        end_sample = (i + 1) * per_worker
+        end = end_sample * interval if end_sample < sample_total else None
+        ranges.append((start_sample * interval, end))
+    return ranges
+
+def _process_video_range(video_path, output_folder, interval, start_frame, end_frame,
+                         json_format="pretty", annotate="jpeg", inference_size=None, roi=False,
+                         cache_path=None):
+    """
+    子进程入口：定位到start_frame，处理[start_frame, end_frame)内的截取帧
+    每个子进程有自己的pose_engine，因此各自持有一个跟踪模式的检测器
+    标注视频模式下每个子进程输出自己范围的一段MP4（annotated_XXXX.mp4，XXXX为起始截取序号）
+    cache_path: 关键点缓存文件，每个子进程打开自己的连接
+    返回 (截取的帧数, 缓存命中次数, 缓存未命中次数)
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"无法打开视频文件: {video_path}")
+        return 0, 0, 0
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    
+    extract_count = 0
+    region = InferenceRegion(inference_size, roi)
+    cache = LandmarkCache(cache_path) if cache_path else None
+    with pose_engine.acquire(
+        static_image_mode=False,
+        model_complexity=2,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5) as pose, SkeletonWriter(json_format) as writer, \
+            AnnotationWriter(annotate, output_folder, fps=fps / interval if fps > 0 else 1.0,
+                             video_name=f"annotated_{start_frame // interval + 1:04d}.mp4") as annotator:
+        
+        if cache is not None:
+            pose = CachedPose(cache, pose, PoseEngine.make_key(False, 2, 0.5, 0.5))
+        for frame_count, _, frame in iter_sampled_frames(cap, interval, start_frame=start_frame,
+                                                         end_frame=end_frame):
+            extract_count += 1
+            # 截取序号由帧号直接算出，与串行处理的编号一致
+            process_sampled_frame(frame, frame_count, frame_count // interval + 1,
+                                  fps, output_folder, pose, writer, annotator=annotator,
+                                  region=region)
+    
+    cap.release()
+    if cache is None:
+        return extract_count, 0, 0
+    cache.close()
+    return extract_count, cache.hits, cache.misses
 
+def process_video_parallel(video_path, output_folder, interval=15, workers=None,
+                           json_format="pretty", annotate="jpeg", inference_size=None, roi=False,
+                           cache=None):
+    """
+    多进程并行处理视频：按帧范围切分，每个子进程定位到自己的范围并运行独立的检测器
+    输出的frame_XXXX编号、frame_number和time_seconds与串行处理相同
+    workers: 进程数，默认为CPU核数
+    cache: 关键点缓存（LandmarkCache实例或缓存文件路径），各子进程共用同一个缓存文件
+    返回截取的帧数
+    """
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"已创建输出文件夹: {output_folder}")
+    
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"无法打开视频文件: {video_path}")
+        return 0
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    
+    workers = workers or os.cpu_count() or 1
+    ranges = split_frame_ranges(total_frames, interval, workers)
+    print(f"视频信息: FPS={fps:.2f}, 总帧数={total_frames}，使用 {len(ranges)} 个进程并行处理")
+    
+    cache_path = cache.path if isinstance(cache, LandmarkCache) else cache
+    
+    # 使用spawn启动子进程，避免fork继承父进程中MediaPipe的线程状态
+    extract_count = 0
+    cache_hits = cache_misses = 0
+    with ProcessPoolExecutor(max_workers=len(ranges),
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(_process_video_range, video_path, output_folder, interval,
+                            start, end, json_format, annotate, inference_size, roi, cache_path)
+            for start, end in ranges
+        ]
+        for future in futures:
+            count, hits, misses = future.result()
+            extract_count += count
+            cache_hits += hits
+            cache_misses += misses
+    
+    print_cache_stats(cache_hits, cache_misses)
+    print(f"\n视频处理完成，共截取 {extract_count} 帧")
+    print(f"结果保存至: {output_folder}")
+    return extract_count
 
+def benchmark_process_video(video_path, output_folder, interval=15, workers=None):
+    """对比串行与并行处理同一视频的耗时，打印并返回加速比"""
+    workers = workers or os.cpu_count() or 1
+    
+    start = time.perf_counter()
+    process_video(video_path, output_folder, interval, workers=1)
+    serial_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    process_video_parallel(video_path, output_folder, interval, workers)
+    parallel_time = time.perf_counter() - start
+    
+    speedup = serial_time / parallel_time if parallel_time > 0 else float('inf')
+    print(f"\n串行耗时: {serial_time:.2f}秒，并行({workers}进程)耗时: {parallel_time:.2f}秒，加速比: {speedup:.2f}x")
+    return {"serial_seconds": serial_time, "parallel_seconds": parallel_time,
+            "workers": workers, "speedup": speedup}
 
+# ----------------------
+# 批量处理图片文件夹
+# ----------------------
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+# 增量记录不使用.json后缀，输出文件夹中的.json文件都是骨架（加载样本、热更新、关键动作跟踪都按后缀读取）
+IMAGE_MANIFEST = ".image_manifest"
+OLD_IMAGE_MANIFEST = ".image_manifest.json"  # 旧版本的文件名，读取后删除
 
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# 子进程中已打开的关键点缓存（按文件路径），同一进程处理多张图片时复用连接
+_worker_caches = {}
+
+def _worker_cache(cache):
+    """子进程中按文件路径复用关键点缓存，进程退出时关闭（写入攒下的最后使用时间）"""
+    if cache is None or isinstance(cache, LandmarkCache):
+        return cache
+    if cache not in _worker_caches:
+        _worker_caches[cache] = LandmarkCache(cache)
+        # 进程池的子进程退出时不执行atexit，用multiprocessing的Finalize关闭
+        multiprocessing.util.Finalize(None, _worker_caches[cache].close, exitpriority=10)
+    return _worker_caches[cache]
+
+def _process_image_file(image_path, json_path, json_format="pretty", save_image=False,
+                        cache=None):
+    """
+    子进程入口：检测一张图片并写出骨架JSON（与视频截取帧相同的格式，含腰部节点）
+    子进程的pose_engine在多张图片之间复用，检测器始终是预热好的
+    cache: 关键点缓存（子进程中为文件路径，串行处理时为已打开的LandmarkCache），命中时跳过推理
+    返回 (是否检测到人体, 是否命中缓存)
+    """
+    image = cv2.imread(image_path)
+    if image is None:
+        print(f"无法读取图片: {image_path}")
+        return False, False
+    img_path = None
+    if save_image:
+        img_path = os.path.splitext(json_path)[0] + ".jpg"
+        if os.path.abspath(img_path) == os.path.abspath(image_path):
+            img_path = os.path.splitext(json_path)[0] + "_pose.jpg"  # 不覆盖原图
+    
+    cache_hit = False
+    cache = _worker_cache(cache)
+    if cache is not None:
+        hits = cache.hits
+        with pose_engine.acquire(static_image_mode=True) as pose:
+            success, landmarks = detect_pose_with_reduced_head(
+                image, img_path, pose=CachedPose(cache, pose, PoseEngine.make_key(True, 2, 0.5)))
+        cache_hit = cache.hits > hits
+    else:
+        success, landmarks = detect_pose_with_reduced_head(image, img_path)
+    if not (success and landmarks):
+        return False, cache_hit
+    skeleton_data = get_universal_skeleton_coords(landmarks)
+    if not skeleton_data:
+        return False, cache_hit
+    record = build_skeleton_record(skeleton_data, {
+        "type": "image",
+        "source_image": os.path.basename(image_path)
+    })
+    write_skeleton_record(record, json_path, json_format)
+    return True, cache_hit
+
+def process_image_dir(image_dir, output_folder, workers=None, json_format="pretty",
+                      save_image=False, force=False, cache=None):
+    """
+    批量处理图片文件夹：每张图片输出一个以完整文件名命名的骨架JSON（含腰部节点），
+    如 a.jpg -> a.jpg.json，a.jpg 和 a.png 不会互相覆盖
+    workers: 进程数，默认为CPU核数；每个子进程持有自己的预热检测器
+    save_image: 是否同时保存标注后的图片（保存为 输出文件夹/a.jpg.jpg）
+    force: 忽略增量记录，全部重新处理
+    cache: 关键点缓存文件路径（或LandmarkCache实例），内容相同的图片不再重复推理
+    增量处理：输出文件夹中的.image_manifest记录每张图片的大小、修改时间、SHA1和输出选项，
+    输出选项（json_format、save_image）变化时重新处理；大小和修改时间都没变的图片直接跳过，
+    修改时间变了但内容哈希相同的也跳过
+    返回 (本次处理的图片数, 跳过的图片数)
+    """
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"已创建输出文件夹: {output_folder}")
+    
+    manifest_path = os.path.join(output_folder, IMAGE_MANIFEST)
+    old_manifest_path = os.path.join(output_folder, OLD_IMAGE_MANIFEST)
+    if os.path.exists(old_manifest_path):
+        if not os.path.exists(manifest_path):
+            os.replace(old_manifest_path, manifest_path)
+        else:
+            os.remove(old_manifest_path)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    
+    # 找出需要处理的图片
+    options = {"json_format": json_format, "save_image": bool(save_image)}
+    tasks = []
+    skipped = 0
+    for filename in sorted(os.listdir(image_dir)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image_path = os.path.join(image_dir, filename)
+        json_path = os.path.join(output_folder, filename + ".json")
+        stat = os.stat(image_path)
+        entry = manifest.get(filename)
+        output_ok = (entry is not None and entry.get("options") == options and
+                     (not entry["detected"] or os.path.exists(json_path)))
+        if output_ok and entry["size"] == stat.st_size:
+            if entry["mtime_ns"] == stat.st_mtime_ns:
+                skipped += 1
+                continue
+            sha1 = _file_sha1(image_path)
+            if entry["sha1"] == sha1:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                skipped += 1
+                continue
+        tasks.append((filename, image_path, json_path, stat))
+    
+    print(f"共 {len(tasks) + skipped} 张图片，需要处理 {len(tasks)} 张，跳过 {skipped} 张")
+    
+    cache_path = cache.path if isinstance(cache, LandmarkCache) else cache
+    workers = min(workers or os.cpu_count() or 1, max(1, len(tasks)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            outcomes = list(executor.map(
+                _process_image_file,
+                [task[1] for task in tasks], [task[2] for task in tasks],
+                [json_format] * len(tasks), [save_image] * len(tasks), [cache_path] * len(tasks),
+                chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        # 串行处理在当前进程中进行，缓存用完即关闭
+        cache, close_cache = open_landmark_cache(cache)
+        outcomes = [_process_image_file(task[1], task[2], json_format, save_image, cache)
+                    for task in tasks]
+        if close_cache:
+            cache.close()
+    detected = [found for found, _ in outcomes]
+    if cache_path:
+        cache_hits = sum(1 for _, hit in outcomes if hit)
+        print_cache_stats(cache_hits, len(outcomes) - cache_hits)
+    
+    # 更新增量记录（未检测到人体的图片也记录下来，内容不变就不再重试）
+    for (filename, image_path, json_path, stat), found in zip(tasks, detected):
+        manifest[filename] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": _file_sha1(image_path),
+            "options": options,
+            "detected": found
+        }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    
+    print(f"图片处理完成，检测到人体 {sum(detected)} 张，结果保存至: {output_folder}")
+    return len(tasks), skipped
+
+def process_camera(camera_path, output_folder, pose=None, region=None, with_info=False):
+    """
+    处理摄像头的一帧图像，返回骨架数据（未检测到人体时为None）
+    pose: 摄像头循环借出的跟踪模式实例；为None时使用引擎中的单图模式实例
+    region: 摄像头会话的InferenceRegion（推理分辨率和跟踪ROI）
+    with_info: 为True时返回 (骨架数据, 推理信息)，推理信息中的model_complexity为产生该帧的模型复杂度
+               （使用AdaptivePose时为实际使用的复杂度，否则为None），骨架数据本身只包含关键点
+    """
+    skeleton_data = None
+    success, landmarks = detect_pose_with_reduced_head(camera_path, pose=pose, region=region)
+    if success and landmarks:
+        # 获取骨架数据
+        skeleton_data = get_universal_skeleton_coords(landmarks) or None
+    if with_info:
+        info = {"model_complexity": pose.last_complexity if isinstance(pose, AdaptivePose) else None}
+        return skeleton_data, info
+    return skeleton_data
 
 if __name__ == "__main__":
     # 视频路径和输出文件夹
@@ -0,0 +1,80 @@
+#实时动作进度跟踪：关键动作序列在启动时一次性读入内存并打包，
+#每帧只与当前动作和后面几个动作比对，连续多帧达标才算完成（防止单帧噪声误推进或卡住），完成时产生进度事件
+import os
+from collections import namedtuple
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from match import load_skeletons_from_dir
+from skeleton_library import SCORE_FIELDS, SkeletonLibrary
+
+# kind: "matched"（完成动作）/ "skipped"（直接完成了后面的动作，跳过了这个动作）/ "finished"（全部完成）
+# index/name: 对应的关键动作序号和文件名；score: 完成时的评分
+ProgressEvent = namedtuple("ProgressEvent", ["kind", "index", "name", "score"])
+
+class RoutineTracker:
+    """
+    关键动作序列的流式进度跟踪
+    keymotions: 按顺序排列的 [(文件名, 骨架字典), ...]
+    threshold: 评分低于该值视为达标（与motion_match_or_not的0.25一致）
+    release: 评分高于 threshold * release 时清零连续达标计数，介于两者之间时保持计数（滞回）
+    confirm_frames: 连续达标多少帧才算完成动作
+    lookahead: 除当前动作外还比对后面几个动作（漏检某个动作时可以继续推进）
+    """
+    def __init__(self, keymotions: List[Tuple[str, Dict]], threshold: float = 0.25, release: float = 1.2,
+                 confirm_frames: int = 2, lookahead: int = 1, metric: str = "weighted"):
+        self.library = SkeletonLibrary(keymotions, metric)
+        self.names = self.library.names
+        self.threshold = threshold
+        self.release = release
+        self.confirm_frames = confirm_frames
+        self.lookahead = lookahead
+        self.reset()
+
+    @classmethod
+    def from_dir(cls, keymotion_path: str, **kwargs) -> "RoutineTracker":
+        """按文件名顺序读取关键动作文件夹（frame_XXXX编号即动作顺序）"""
+        return cls(sorted(load_skeletons_from_dir(keymotion_path), key=lambda item: item[0]), **kwargs)
+
+    def reset(self):
+        self.current = 0
+        self.hits = np.zeros(len(self.names), dtype=int)  # 每个动作的连续达标帧数
+        self.last_scores = {}
+
+    @property
+    def finished(self) -> bool:
+        return self.current >= len(self.names)
+
+    @property
+    def progress(self) -> float:
+        return self.current / len(self.names) if len(self.names) else 1.0
+
+    def update(self, skel: Dict) -> List[ProgressEvent]:
+        """输入一帧骨架（未检测到人体时为None），返回这一帧产生的进度事件"""
+        if self.finished or not skel:
+            return []
+
+        # 只对候选窗口（当前动作和后面lookahead个动作）打分，每帧的工作量固定
+        window = slice(self.current, min(self.current + self.lookahead + 1, len(self.names)))
+        features = self.library.features.subset(window, SCORE_FIELDS)
+        scores = self.library.kernel(self.library.input_features(skel), features)
+        self.last_scores = dict(zip(self.names[window], scores.tolist()))
+
+        hits = self.hits[window]
+        hits[scores < self.threshold] += 1
+        hits[scores > self.threshold * self.release] = 0
+
+        confirmed = np.flatnonzero(hits >= self.confirm_frames)
+        if not len(confirmed):
+            return []
+
+        # 取窗口中最靠前的完成动作，跳过的动作记为skipped
+        target = self.current + int(confirmed[0])
+        events = [ProgressEvent("skipped", i, self.names[i], None) for i in range(self.current, target)]
+        events.append(ProgressEvent("matched", target, self.names[target], float(scores[target - self.current])))
+        self.current = target + 1
+        self.hits[:] = 0
+        if self.finished:
+            events.append(ProgressEvent("finished", target, self.names[target], None))
+        return events
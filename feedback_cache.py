@@ -0,0 +1,152 @@
+#AI反馈缓存：反馈的提示词只取决于样本名称、评分、阈值和是否匹配成功，
+#同一个动作反复练习时按 (样本名称, 评分区间, 是否成功, 阈值) 复用已生成的反馈，不再每次调用大模型
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+class FeedbackCache:
+    """
+    带过期时间和LRU淘汰的反馈缓存
+    maxsize: 最多缓存的键数，超出时淘汰最久未使用的
+    ttl: 缓存的反馈在生成后保留多少秒
+    bucket: 评分区间的宽度，同一区间内的评分共用反馈
+    variants: 每个键调用几次大模型，次数不足时继续调用补充不同的反馈，调用满variants次后轮流返回已有的反馈
+              （避免反复听到同一句话；大模型返回重复的反馈时只保留一条，不会因此一直调用）
+    path: JSON文件路径，设置后缓存写入磁盘，服务重启后继续使用
+    """
+    def __init__(self, maxsize: int = 512, ttl: float = 24 * 3600, bucket: float = 0.01, variants: int = 1,
+                 path: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.bucket = bucket
+        self.variants = max(1, variants)
+        self.path = path
+        # 键 -> {"created": 生成时间, "variants": [不同的反馈, ...], "attempts": 已生成的次数, "next": 下一条的序号}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    def key(self, match_result: Dict) -> Tuple:
+        """比对结果对应的缓存键；评分不是有限数值（如没有可比较关键点时的inf）时返回None，不使用缓存"""
+        score = match_result['相似度分数']
+        if score is None or not math.isfinite(score):
+            return None
+        return (match_result['样本名称'], int(round(score / self.bucket)),
+                bool(match_result['是否匹配成功']), match_result['匹配阈值'])
+
+    def _alive(self, key, entry, now) -> bool:
+        if now - entry["created"] <= self.ttl:
+            return True
+        del self._entries[key]
+        self.expired += 1
+        return False
+
+    def get(self, key: Tuple):
+        """返回缓存的反馈（已生成variants次时轮流返回），没有可用的反馈时返回None"""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._alive(key, entry, time.time()) or entry["attempts"] < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            feedback = entry["variants"][entry["next"] % len(entry["variants"])]
+            entry["next"] += 1
+            return feedback
+
+    def put(self, key: Tuple, feedback: str):
+        """加入一条新生成的反馈（key为None时不缓存）"""
+        if key is None:
+            return
+        with self._lock:
+            now = time.time()
+            entry = self._entries.get(key)
+            if entry is None or not self._alive(key, entry, now):
+                entry = self._entries[key] = {"created": now, "variants": [], "attempts": 0, "next": 0}
+            entry["attempts"] += 1
+            if feedback not in entry["variants"] and len(entry["variants"]) < self.variants:
+                entry["variants"].append(feedback)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if self.path:
+                self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取反馈缓存 {self.path} 失败: {e}")
+            return
+        now = time.time()
+        # 文件中按最近使用的顺序保存，依次加入即可恢复LRU顺序（旧文件没有生成次数，按反馈条数计）
+        for item in saved:
+            if now - item["created"] <= self.ttl:
+                self._entries[tuple(item["key"])] = {"created": item["created"], "variants": item["variants"],
+                                                     "attempts": item.get("attempts", len(item["variants"])),
+                                                     "next": 0}
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        # 先写入临时文件再替换，写入中途退出不会损坏已有的缓存文件
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump([{"key": list(key), "created": entry["created"], "variants": entry["variants"],
+                            "attempts": entry["attempts"]}
+                           for key, entry in self._entries.items()], f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"保存反馈缓存 {self.path} 失败: {e}")
+
+    def stats(self) -> dict:
+        """命中率、缓存的键数和淘汰/过期的次数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired
+            }
+
+if __name__ == "__main__":
+    # 自检：评分为inf/nan/None的比对结果不使用缓存，也不抛出异常
+    cache = FeedbackCache()
+    for score in (float('inf'), float('-inf'), float('nan'), None):
+        result = {"样本名称": None, "相似度分数": score, "是否匹配成功": False, "匹配阈值": 0.15}
+        key = cache.key(result)
+        assert key is None, key
+        cache.put(key, "反馈")
+        assert cache.get(key) is None
+    assert cache.stats()["size"] == 0
+    # 有限评分照常缓存
+    result = {"样本名称": "frame_0001.json", "相似度分数": 0.1234, "是否匹配成功": True, "匹配阈值": 0.15}
+    cache.put(cache.key(result), "反馈")
+    assert cache.get(cache.key(result)) == "反馈"
+    # 多条反馈时大模型返回相同的文本：生成满variants次后同样命中缓存
+    cache = FeedbackCache(variants=3)
+    key = cache.key(result)
+    for _ in range(3):
+        assert cache.get(key) is None
+        cache.put(key, "同一句反馈")
+    assert all(cache.get(key) == "同一句反馈" for _ in range(5))
+    assert cache.stats()["hits"] == 5, cache.stats()
+    print("反馈缓存自检通过")
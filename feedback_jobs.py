@@ -0,0 +1,93 @@
+#AI反馈的后台任务池：比对结果先返回给前端，AI反馈在后台线程池中生成，
+#前端凭反馈编号轮询或通过SSE等待结果，动作比对的延迟不再受大模型调用耗时影响
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+class FeedbackJobs:
+    """
+    后台生成AI反馈
+    generate: 生成函数 generate(match_result) -> 反馈文本（如ActionAgent.generate_feedback）
+    workers: 同时进行的大模型调用数
+    ttl: 任务提交后保留多少秒供前端取回（未完成的任务不会清理），过期的任务在提交、查询和统计时清理
+    max_pending: 最多同时未完成的任务数，已满时拒绝新任务（不排队），大模型变慢时队列不会无限增长
+    提交时带合并键（key）的任务：同一个合并键同时只有一个未完成的任务，未完成时再次提交直接返回该任务的编号，
+    不再排队新的大模型调用；合并键应只在反馈内容相同时相同（如 (客户端编号, 反馈缓存键)），不带合并键时不合并
+    """
+    def __init__(self, generate, workers: int = 4, ttl: float = 300.0, max_pending: int = 32):
+        self.generate = generate
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feedback")
+        self._jobs = {}  # 反馈编号 -> (Future, 提交时间)
+        self._pending_keys = {}  # 合并键 -> 未完成任务的反馈编号
+        self._lock = threading.Lock()
+        self.submitted = 0  # 累计提交的任务数
+        self.coalesced = 0  # 合并到同一合并键未完成任务的次数
+        self.rejected = 0  # 未完成任务已满时拒绝的次数
+
+    def submit(self, match_result, key=None):
+        """提交一个反馈任务，立即返回反馈编号；同一合并键的任务未完成时返回该任务的编号；未完成的任务已满时返回None"""
+        with self._lock:
+            self._cleanup()
+            job_id = self._pending_keys.get(key) if key is not None else None
+            if job_id is not None:
+                self.coalesced += 1
+                return job_id
+            if sum(not future.done() for future, _ in self._jobs.values()) >= self.max_pending:
+                self.rejected += 1
+                return None
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = (self._pool.submit(self.generate, match_result), time.time())
+            if key is not None:
+                self._pending_keys[key] = job_id
+            self.submitted += 1
+        return job_id
+
+    def _cleanup(self):
+        now = time.time()
+        expired = [job_id for job_id, (future, created) in self._jobs.items()
+                   if future.done() and now - created > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+        finished = [key for key, job_id in self._pending_keys.items()
+                    if job_id not in self._jobs or self._jobs[job_id][0].done()]
+        for key in finished:
+            del self._pending_keys[key]
+
+    def get(self, job_id: str, timeout: float = 0):
+        """
+        查询反馈任务，timeout>0时最多等待timeout秒
+        返回 {"状态": "等待中"/"成功"/"失败", ...}，反馈编号不存在（或已过期）时返回None
+        """
+        with self._lock:
+            self._cleanup()
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future = job[0]
+        if timeout > 0:
+            wait([future], timeout=timeout)
+        if not future.done():
+            return {"状态": "等待中", "反馈编号": job_id}
+        error = future.exception()
+        if error is not None:
+            return {"状态": "失败", "反馈编号": job_id, "错误信息": f"AI反馈生成失败：{error}"}
+        return {"状态": "成功", "反馈编号": job_id, "AI动作反馈": future.result()}
+
+    def stats(self) -> dict:
+        """累计提交、合并和拒绝的任务数，以及当前保留的任务中未完成和失败的任务数"""
+        with self._lock:
+            self._cleanup()
+            futures = [future for future, _ in self._jobs.values()]
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "pending": sum(not future.done() for future in futures),
+            "failed": sum(future.done() and future.exception() is not None for future in futures)
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,128 @@
+#样本库热更新：后台线程定期检查样本文件夹，只重新解析新增或修改过的骨架JSON，
+#在后台重新打包样本库后一次性替换，正在进行的比对请求始终使用完整的旧样本库或新样本库
+import os
+import threading
+import time
+
+from skeleton_dataset import (INDEX_FILE, is_skeleton_dataset, json_file_stamps, load_skeleton_dataset,
+                              load_skeleton_files, load_snapshot, save_snapshot)
+from skeleton_library import SkeletonLibrary
+
+class LibraryWatcher:
+    """
+    监视样本文件夹并增量重建样本库
+    sample_dir: 骨架JSON文件夹或二进制数据集
+    on_swap: 样本库重建完成时的回调 on_swap(skeletons, library)，由调用方完成替换
+    interval: 检查间隔（秒）
+    snapshot_dir: 快照缓存文件夹，设置后首次检查时可直接打开快照，重建后更新快照；默认不使用快照
+    """
+    def __init__(self, sample_dir, on_swap, metric="average", interval=2.0, snapshot_dir=None):
+        self.sample_dir = sample_dir
+        self.on_swap = on_swap
+        self.metric = metric
+        self.interval = interval
+        self.snapshot_dir = snapshot_dir
+        self._entries = {}  # 文件名 -> (修改时间, 文件大小, 骨架数据)
+        self._failed = {}  # 解析失败的文件名 -> (修改时间, 文件大小)，文件再次变化时才重试
+        self._dataset_stamp = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()  # 同一时间只允许一次扫描（后台线程与手动调用）
+        # 统计信息
+        self.samples = 0
+        self.reloads = 0
+        self.parsed = 0
+        self.last_reload = None
+
+    def _scan_json_dir(self, stamps):
+        """比较文件的修改时间和大小，只解析有变化的文件（线程池并行）；返回样本是否有变化"""
+        changed = False
+        for filename in set(self._entries) - set(stamps):
+            del self._entries[filename]
+            changed = True
+        for filename in set(self._failed) - set(stamps):
+            del self._failed[filename]
+
+        pending = [filename for filename, stamp in stamps.items()
+                   if self._entries.get(filename, (None, None))[:2] != stamp and self._failed.get(filename) != stamp]
+        for filename, skel in load_skeleton_files(self.sample_dir, pending):
+            stamp = stamps[filename]
+            self.parsed += 1
+            if skel is None:
+                # 文件可能正在写入，保留旧数据，文件再次变化时重试
+                self._failed[filename] = stamp
+                continue
+            self._failed.pop(filename, None)
+            self._entries[filename] = (stamp[0], stamp[1], skel)
+            changed = True
+        return changed
+
+    def _load_from_snapshot(self, stamps):
+        """首次检查时如果文件夹的快照仍然有效，直接用快照填充已知文件，返回快照数据集（无效时返回None）"""
+        dataset = load_snapshot(self.sample_dir, stamps, self.snapshot_dir)
+        if dataset is not None:
+            for filename, skel in dataset:
+                self._entries[filename] = stamps[filename] + (skel,)
+        return dataset
+
+    def scan(self):
+        """检查一次样本文件夹，有变化时重建样本库并通过on_swap替换；返回是否发生了替换"""
+        with self._lock:
+            if not os.path.exists(self.sample_dir):
+                return False
+            if is_skeleton_dataset(self.sample_dir):
+                # 二进制数据集整体导出，索引文件变化时重新内存映射打开（几乎不耗时）
+                stat = os.stat(os.path.join(self.sample_dir, INDEX_FILE))
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if stamp == self._dataset_stamp:
+                    return False
+                self._dataset_stamp = stamp
+                skeletons = load_skeleton_dataset(self.sample_dir)
+            else:
+                stamps = json_file_stamps(self.sample_dir)
+                skeletons = self._load_from_snapshot(stamps) if self.snapshot_dir and not self.reloads else None
+                if skeletons is None:
+                    if not self._scan_json_dir(stamps) and self.reloads:
+                        return False
+                    skeletons = [(filename, self._entries[filename][2]) for filename in sorted(self._entries)]
+                    # 所有文件都已解析成功时更新快照，服务重启时不必重新解析
+                    if self.snapshot_dir and skeletons and not self._failed:
+                        save_snapshot(self.sample_dir, skeletons, stamps, self.snapshot_dir)
+
+            # 在当前线程中完成打包和预计算，替换只是一次赋值
+            library = SkeletonLibrary(skeletons, metric=self.metric)
+            self.on_swap(skeletons, library)
+            self.samples = len(library)
+            self.reloads += 1
+            self.last_reload = time.time()
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"样本库热更新失败: {e}")
+
+    def start(self):
+        """启动后台检查线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="library-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        """样本数、重建次数、累计解析的文件数和最近一次重建的时间"""
+        return {
+            "samples": self.samples,
+            "reloads": self.reloads,
+            "parsed": self.parsed,
+            "last_reload": self.last_reload
+        }
@@ -0,0 +1,173 @@
+#大规模样本库的近似近邻检索：把每个参考骨架编码为定长特征向量，按聚类划分为若干单元（每个单元记录中心和半径），
+#查询时只扫描离输入最近的几个单元，取特征距离最小的top-k个候选，再用样本库的精确评分重新排序
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from skeleton_dataset import SkeletonDataset
+from skeleton_library import SCORE_FIELDS, SkeletonFeatures, SkeletonLibrary, get_metric
+
+# 样本数少于该值时不分单元，直接在全部样本上取候选
+MIN_INDEXED = 2048
+
+def pose_vectors(features: SkeletonFeatures, metric) -> np.ndarray:
+    """
+    把骨架特征编码为定长向量 (..., 维度)，向量的欧氏距离近似精确评分
+    关键点坐标按评分方式的关键点权重和距离系数缩放，缺失的关键点用腰部节点代替；使用法向量的评分方式额外拼接躯干法向量
+    """
+    metric = get_metric(metric)
+    points = np.where(features.present[..., None], features.points, features.waist[..., None, :3])
+    points = np.nan_to_num(points)
+    weights = metric.point_weights
+    scale = np.sqrt(weights) * metric.distance_scale / np.sqrt(weights.sum())
+    parts = [(points * scale[:, None]).reshape(points.shape[:-2] + (-1,))]
+    if metric.normal_weight:
+        parts.append(features.normals * metric.normal_weight)
+    return np.concatenate(parts, axis=-1)
+
+def squared_distances(queries: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """(查询数, 维度) 与 (点数, 维度) 两两之间的平方距离"""
+    d = (np.sum(queries ** 2, axis=1)[:, None] - 2.0 * queries @ points.T +
+         np.sum(points ** 2, axis=1)[None, :])
+    return np.maximum(d, 0.0)
+
+def _kmeans(vectors: np.ndarray, n_cells: int, iterations: int = 8, seed: int = 0) -> np.ndarray:
+    """简单的k-means聚类，返回每个向量所属的单元编号"""
+    rng = np.random.default_rng(seed)
+    centers = vectors[rng.choice(len(vectors), n_cells, replace=False)]
+    labels = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        # 分块计算，避免 样本数×单元数 的矩阵过大
+        for start in range(0, len(vectors), 8192):
+            chunk = vectors[start:start + 8192]
+            labels[start:start + 8192] = np.argmin(squared_distances(chunk, centers), axis=1)
+        counts = np.bincount(labels, minlength=n_cells)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, vectors)
+        filled = counts > 0
+        centers[filled] = sums[filled] / counts[filled, None]
+    return labels
+
+class PoseIndex:
+    """
+    建立在SkeletonLibrary之上的top-k检索索引
+    n_cells: 单元数，默认约为 sqrt(样本数)
+    n_probe: 每次查询扫描的单元数（召回率/耗时的调节参数：越大越接近暴力搜索，越小越快）
+    k: 进入精确重排序的候选数
+    """
+    def __init__(self, library: SkeletonLibrary, n_cells: int = None, n_probe: int = 8, k: int = 32):
+        self.library = library
+        self.n_probe = n_probe
+        self.k = k
+        self.vectors = pose_vectors(library.features, library.metric)
+
+        count = len(library)
+        if n_cells is None:
+            n_cells = int(np.sqrt(count)) if count >= MIN_INDEXED else 1
+        n_cells = max(1, min(n_cells, count))
+        labels = _kmeans(self.vectors, n_cells) if n_cells > 1 else np.zeros(count, dtype=np.int64)
+
+        # 按单元排序后连续存储，每个单元是 order[offsets[c]:offsets[c + 1]]
+        self.order = np.argsort(labels, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_cells))])
+        self.cell_vectors = self.vectors[self.order]
+        self.centers = np.stack([
+            self.cell_vectors[self.offsets[c]:self.offsets[c + 1]].mean(axis=0)
+            if self.offsets[c + 1] > self.offsets[c] else np.full(self.vectors.shape[1], np.inf)
+            for c in range(n_cells)])
+        self.radii = np.array([
+            np.sqrt(squared_distances(self.centers[c:c + 1],
+                                       self.cell_vectors[self.offsets[c]:self.offsets[c + 1]]).max())
+            if self.offsets[c + 1] > self.offsets[c] else 0.0
+            for c in range(n_cells)])
+
+    def __len__(self):
+        return len(self.library)
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.centers)
+
+    def candidates(self, input_skel: Dict, n_probe: int = None, k: int = None) -> np.ndarray:
+        """返回特征距离最小的top-k个样本下标（只扫描最近的n_probe个单元）"""
+        n_probe = self.n_probe if n_probe is None else n_probe
+        k = self.k if k is None else k
+        query = pose_vectors(self.library.input_features(input_skel), self.library.metric)[None]
+
+        if self.n_cells > 1:
+            # 以"到中心的距离减去半径"（单元内可能的最近距离）排序单元
+            center_dist = np.sqrt(squared_distances(query, self.centers)[0]) - self.radii
+            cells = np.argsort(center_dist)[:max(1, n_probe)]
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells])
+        else:
+            rows = np.arange(len(self.order))
+        dist = squared_distances(query, self.cell_vectors[rows])[0]
+        if len(rows) > k:
+            top = np.argpartition(dist, k)[:k]
+            rows = rows[top]
+        return self.order[rows]
+
+    def best_match(self, input_skel: Dict, n_probe: int = None, k: int = None) -> Tuple[str, float]:
+        """返回 (最佳匹配的样本名, 精确评分)；候选覆盖真正的最佳样本时与暴力搜索结果一致"""
+        if not len(self):
+            return None, float('inf')
+        indices = self.candidates(input_skel, n_probe, k)
+        library = self.library
+        scores = library.kernel(library.input_features(input_skel), library.features.subset(indices, SCORE_FIELDS))
+        best = int(np.argmin(scores))
+        if not np.isfinite(scores[best]):
+            return None, float('inf')
+        return library.names[indices[best]], float(scores[best])
+
+def benchmark_index(library: SkeletonLibrary, queries: List[Dict], n_probes=(1, 2, 4, 8, 16),
+                    k: int = 32, repeat: int = 1):
+    """对比索引检索与暴力搜索的召回率（最佳样本一致的比例）和单次查询耗时"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        exact = [library.best_match(q) for q in queries]
+    brute_ms = (time.perf_counter() - start) * 1000 / (len(queries) * repeat)
+
+    start = time.perf_counter()
+    index = PoseIndex(library, k=k)
+    build_s = time.perf_counter() - start
+    print(f"样本数: {len(library)}，单元数: {index.n_cells}，建立索引: {build_s:.2f}秒")
+    print(f"暴力搜索: {brute_ms:.2f}毫秒/次")
+
+    results = []
+    for n_probe in n_probes:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = [index.best_match(q, n_probe=n_probe) for q in queries]
+        index_ms = (time.perf_counter() - start) * 1000 / (len(queries) * repeat)
+        recall = sum(f[0] == e[0] for f, e in zip(found, exact)) / len(queries)
+        print(f"n_probe={n_probe:<3d} k={k}: 召回率 {recall:.3f}，{index_ms:.2f}毫秒/次")
+        results.append({"n_probe": n_probe, "k": k, "recall": recall, "ms": index_ms})
+    return results
+
+if __name__ == "__main__":
+    # 用法: python pose_index.py [样本文件夹] [复制倍数]
+    # 把样本复制多份并加入随机扰动，模拟包含多套动作的大样本库
+    from skeleton_dataset import load_skeletons_from_dir
+
+    sample_dir = sys.argv[1] if len(sys.argv) > 1 else "./test_files/video_output"
+    copies = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    base = SkeletonLibrary(load_skeletons_from_dir(sample_dir))
+    if not len(base):
+        sys.exit("没有找到样本骨架")
+
+    rng = np.random.default_rng(0)
+    jitter = lambda shape, sigma: np.concatenate([rng.normal(0, sigma, shape[:-1] + (3,)),
+                                                  np.zeros(shape[:-1] + (1,))], axis=-1)
+    array = np.concatenate([base.array] + [base.array + jitter(base.array.shape, 0.05)
+                                           for _ in range(copies - 1)])
+    names = [f"{i // len(base)}_{name}" for i, name in enumerate(base.names * copies)]
+    library = SkeletonLibrary.from_array(names, array)
+
+    # 查询：随机样本加小扰动，还原为骨架字典
+    picks = base.array[rng.choice(len(base), 100)]
+    picks = picks + jitter(picks.shape, 0.02)
+    queries = [SkeletonDataset(picks, [{"filename": "", "meta": {}}] * len(picks)).to_skeleton(i)
+               for i in range(len(picks))]
+    benchmark_index(library, queries)
@@ -0,0 +1,71 @@
+#实时姿势流：一个长连接（WebSocket）上连续接收前端的骨架帧，并在同一连接上推送比对结果
+#接收与处理分开：接收线程只保存最新的一帧，处理线程每次取最新的一帧，处理期间到达的旧帧直接丢弃（只处理最新帧），
+#处理速度跟不上摄像头帧率时延迟不会累积
+import threading
+import time
+
+class PoseStream:
+    """
+    一个连接的姿势流
+    process: 处理函数 process(message) -> 要推送的结果字典（返回None时不推送；抛出异常时推送错误消息）
+    send: 推送函数 send(result)
+    """
+    def __init__(self, process, send):
+        self.process = process
+        self.send = send
+        self._latest = None
+        self._closed = False
+        self._cond = threading.Condition()
+        # 统计信息
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.started = time.time()
+
+    def put(self, message):
+        """接收一帧（由接收线程调用，不做任何解析），未处理的上一帧被新帧替换"""
+        with self._cond:
+            if self._latest is not None:
+                self.dropped += 1
+            self._latest = message
+            self.received += 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def run(self):
+        """处理循环（在单独的线程中运行），连接关闭或推送失败时结束"""
+        while True:
+            with self._cond:
+                while self._latest is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                message, self._latest = self._latest, None
+            try:
+                result = self.process(message)
+            except Exception as e:
+                # 单帧处理失败不结束处理循环，把错误推送给前端后继续处理后面的帧
+                result = {"类型": "错误", "错误信息": f"处理失败：{e}"}
+            self.processed += 1
+            if result is None:
+                continue
+            try:
+                self.send(result)
+            except Exception:
+                # 连接已断开
+                self.close()
+                return
+
+    def stats(self) -> dict:
+        """接收、处理、丢弃的帧数和处理帧率"""
+        elapsed = time.time() - self.started
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "fps": round(self.processed / elapsed, 1) if elapsed > 0 else 0.0
+        }
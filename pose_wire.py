@@ -0,0 +1,115 @@
+#骨架数据的紧凑二进制传输格式：按固定关键点顺序排列的float32 (x, y, z, visibility)，加一个小的文件头，
+#服务端用np.frombuffer直接在请求体上解码（不复制、不逐个解析字段）；Content-Type不是该格式时仍按JSON处理
+#
+#格式（小端序）：
+#  文件头 8字节:   魔数 b"PF" | 版本 u8 | 关键点数 L u8 | 帧数 N u16 | 保留 u16
+#  帧信息 N×8字节: 帧号 u32 | 时间（秒）f32
+#  关键点 N×L×16字节: float32 (x, y, z, visibility)，关键点顺序为 LANDMARK_ORDER 的前L个，缺失的关键点为NaN
+import json
+import struct
+import sys
+import time
+from collections import namedtuple
+from typing import Dict, List
+
+import numpy as np
+
+from skeleton_dataset import FIELDS, LANDMARK_ORDER
+
+CONTENT_TYPE = "application/x-pose-frames"
+MAGIC = b"PF"
+WIRE_VERSION = 1
+HEADER = struct.Struct("<2sBBHH")
+FRAME_INFO = np.dtype([("frame_number", "<u4"), ("time_seconds", "<f4")])
+# 前端发送的16个关键点（不含腰部节点，腰部节点由服务端根据肩和髋计算）
+WIRE_LANDMARKS = LANDMARK_ORDER[:16]
+
+# landmarks: (帧数, 关键点数, 4) 的float32数组；frame_numbers/time_seconds: (帧数,)；均为请求体上的只读视图
+PoseFrames = namedtuple("PoseFrames", ["landmarks", "frame_numbers", "time_seconds"])
+
+def decode_frames(body: bytes) -> PoseFrames:
+    """解码二进制骨架数据（不复制数据），格式错误时抛出ValueError"""
+    if len(body) < HEADER.size:
+        raise ValueError("骨架数据过短")
+    magic, version, count, frames, _ = HEADER.unpack_from(body)
+    if magic != MAGIC or version != WIRE_VERSION:
+        raise ValueError(f"不支持的骨架数据格式: {magic!r} 版本 {version}")
+    if not 0 < count <= len(LANDMARK_ORDER):
+        raise ValueError(f"关键点数错误: {count}")
+    info_size = frames * FRAME_INFO.itemsize
+    landmark_count = frames * count * len(FIELDS)
+    if len(body) != HEADER.size + info_size + landmark_count * 4:
+        raise ValueError("骨架数据长度与文件头不一致")
+    info = np.frombuffer(body, dtype=FRAME_INFO, count=frames, offset=HEADER.size)
+    landmarks = np.frombuffer(body, dtype="<f4", count=landmark_count, offset=HEADER.size + info_size)
+    return PoseFrames(landmarks.reshape(frames, count, len(FIELDS)), info["frame_number"], info["time_seconds"])
+
+def encode_frames(landmarks: np.ndarray, frame_numbers=None, time_seconds=None) -> bytes:
+    """把 (帧数, 关键点数, 4) 的关键点数组编码为二进制骨架数据（与script_fixed.js的encodePoseFrame格式相同）"""
+    landmarks = np.asarray(landmarks, dtype="<f4")
+    frames, count = landmarks.shape[:2]
+    info = np.zeros(frames, dtype=FRAME_INFO)
+    if frame_numbers is not None:
+        info["frame_number"] = frame_numbers
+    if time_seconds is not None:
+        info["time_seconds"] = time_seconds
+    return HEADER.pack(MAGIC, WIRE_VERSION, count, frames, 0) + info.tobytes() + landmarks.tobytes()
+
+def packed_frames(frames: PoseFrames) -> np.ndarray:
+    """转换为样本库使用的 (帧数, len(LANDMARK_ORDER), 4) float64数组（未发送的关键点为NaN），可直接用于比对"""
+    packed = np.full((len(frames.landmarks), len(LANDMARK_ORDER), len(FIELDS)), np.nan)
+    packed[:, :frames.landmarks.shape[1]] = frames.landmarks
+    return packed
+
+def frame_to_skeleton(frames: PoseFrames, i: int) -> Dict:
+    """把第i帧还原为与JSON格式相同的骨架字典（保存调试数据等需要字典的地方使用）"""
+    skel = {}
+    for name, values in zip(LANDMARK_ORDER, frames.landmarks[i].tolist()):
+        if values[0] == values[0]:  # NaN：该帧没有这个关键点
+            skel[name] = dict(zip(FIELDS, values))
+    skel.update({
+        "type": "video_frame",
+        "frame_number": int(frames.frame_numbers[i]),
+        "time_seconds": float(frames.time_seconds[i])
+    })
+    return skel
+
+def benchmark_wire(skeletons: List[Dict], repeat: int = 3):
+    """对比JSON与二进制格式每帧的字节数和服务端解码耗时（解码并打包为比对用的数组）"""
+    from skeleton_library import pack_skeleton
+
+    wire = [{name: skel.get(name, {"x": 0.0, "y": 0.0, "z": 0.0, "visibility": 0.0}) for name in WIRE_LANDMARKS}
+            for skel in skeletons]
+    for payload, skel in zip(wire, skeletons):
+        payload.update({"type": "video_frame", "frame_number": skel.get("frame_number", 0),
+                        "time_seconds": skel.get("time_seconds", 0.0), "time_format": "0:00:00"})
+    json_bodies = [json.dumps(payload, separators=(',', ':')).encode('utf-8') for payload in wire]  # 与JSON.stringify相同
+    binary_bodies = [encode_frames(pack_skeleton(payload)[None, :len(WIRE_LANDMARKS)],
+                                   [payload["frame_number"]], [payload["time_seconds"]]) for payload in wire]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for body in json_bodies:
+            pack_skeleton(json.loads(body))
+    json_us = (time.perf_counter() - start) * 1e6 / (len(json_bodies) * repeat)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for body in binary_bodies:
+            packed_frames(decode_frames(body))
+    binary_us = (time.perf_counter() - start) * 1e6 / (len(binary_bodies) * repeat)
+
+    json_bytes = sum(map(len, json_bodies)) / len(json_bodies)
+    binary_bytes = sum(map(len, binary_bodies)) / len(binary_bodies)
+    print(f"每帧字节数: JSON {json_bytes:.0f}，二进制 {binary_bytes:.0f}（{json_bytes / binary_bytes:.1f}倍）")
+    print(f"每帧解码耗时: JSON {json_us:.1f}微秒，二进制 {binary_us:.1f}微秒")
+    return {"json_bytes": json_bytes, "binary_bytes": binary_bytes, "json_us": json_us, "binary_us": binary_us}
+
+if __name__ == "__main__":
+    # 用法: python pose_wire.py [骨架文件夹]
+    from skeleton_dataset import load_skeletons_from_dir
+
+    sample_dir = sys.argv[1] if len(sys.argv) > 1 else "./camread/test_files/video_output"
+    skeletons = [skel for _, skel in load_skeletons_from_dir(sample_dir)]
+    if not skeletons:
+        sys.exit("没有找到骨架数据")
+    benchmark_wire(skeletons)
@@ -4,6 +4,8 @@ import mediapipe as mp
 import numpy as np
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import timedelta
 
 # 初始化MediaPipe组件
@@ -95,35 +97,110 @@ def draw_filtered_landmarks(image, landmarks, connections):
     
     return image
 
-def detect_pose_with_reduced_head(image, output_path=None):
-    """处理图像，使用精简后的头部节点"""
+class PoseEngine:
+    """
+    常驻的姿态检测引擎：按(模式, 模型复杂度, 置信度)缓存MediaPipe Pose实例，
+    避免每帧都重新加载模型和初始化计算图
+    Pose实例本身不是线程安全的，因此每次借出都是独占的，用完归还到池中
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}      # key -> 空闲的Pose实例列表
+        self._created = 0    # 累计创建的实例数量（用于观察池是否生效）
+
+    @staticmethod
+    def make_key(static_image_mode=True, model_complexity=2,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        """池的键：(模式, 模型复杂度, 检测置信度, 跟踪置信度)"""
+        mode = "image" if static_image_mode else "tracking"
+        return (mode, int(model_complexity),
+                round(float(min_detection_confidence), 3),
+                round(float(min_tracking_confidence), 3))
+
+    def _create(self, key):
+        mode, complexity, det_conf, track_conf = key
+        with self._lock:
+            self._created += 1
+        return mp_pose.Pose(
+            static_image_mode=(mode == "image"),
+            model_complexity=complexity,
+            min_detection_confidence=det_conf,
+            min_tracking_confidence=track_conf)
+
+    @contextmanager
+    def acquire(self, static_image_mode=True, model_complexity=2,
+                min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        """
+        借出一个预热好的Pose实例
+        static_image_mode=True: 单张图片模式（每帧独立检测）
+        static_image_mode=False: 跟踪模式（视频/摄像头连续帧，利用上一帧结果加速）
+        """
+        key = self.make_key(static_image_mode, model_complexity,
+                            min_detection_confidence, min_tracking_confidence)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            pose = idle.pop() if idle else None
+        # 模型加载较慢，放在锁外进行，避免阻塞其他线程归还/借出
+        if pose is None:
+            pose = self._create(key)
+        try:
+            yield pose
+        finally:
+            # 跟踪模式的实例带有上一段视频的状态，归还前先重置
+            if key[0] == "tracking":
+                pose.reset()
+            with self._lock:
+                self._idle[key].append(pose)
+
+    def stats(self):
+        """返回池的状态：累计创建数量和各键下的空闲实例数"""
+        with self._lock:
+            return {
+                "created": self._created,
+                "idle": {key: len(poses) for key, poses in self._idle.items()}
+            }
+
+    def close(self):
+        """释放所有空闲的Pose实例"""
+        with self._lock:
+            for poses in self._idle.values():
+                for pose in poses:
+                    pose.close()
+            self._idle.clear()
+
+
+# 模块级共享引擎，process_video 等处理函数都从这里取实例
+pose_engine = PoseEngine()
+
+def detect_pose_with_reduced_head(image, output_path=None, pose=None):
+    """
+    处理图像，使用精简后的头部节点
+    pose: 调用方已借出的Pose实例（如视频跟踪模式）；为None时从pose_engine借一个单图模式实例
+    """
     if image is None:
         print("无效的图像数据")
         return False, None
     
     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     
-    with mp_pose.Pose(
-        static_image_mode=True,
-        model_complexity=2,
-        min_detection_confidence=0.5) as pose:
-        
+    if pose is None:
+        with pose_engine.acquire(static_image_mode=True) as pose:
+            results = pose.process(image_rgb)
+    else:
         results = pose.process(image_rgb)
-        
-        if results.pose_landmarks:
-            # 绘制过滤后的骨架
-            image = draw_filtered_landmarks(
-                image, 
-                results.pose_landmarks, 
-                REDUCED_CONNECTIONS
-            )
-        
-        if output_path:
-            cv2.imwrite(output_path, image)
-            print(f"处理后的图像已保存至: {output_path}")
-            return True, results.pose_landmarks
-        else:
-            return True, results.pose_landmarks
+    
+    if results.pose_landmarks:
+        # 绘制过滤后的骨架
+        image = draw_filtered_landmarks(
+            image, 
+            results.pose_landmarks, 
+            REDUCED_CONNECTIONS
+        )
+    
+    if output_path:
+        cv2.imwrite(output_path, image)
+        print(f"处理后的图像已保存至: {output_path}")
+    return True, results.pose_landmarks
 
 def get_universal_skeleton_coords(landmarks):
     """从landmarks获取人体骨架的通用标准化坐标"""
@@ -196,7 +273,8 @@ def process_video(video_path, output_folder, interval=15):
     frame_count = 0
     extract_count = 0
     
-    with mp_pose.Pose(
+    # 从引擎借出跟踪模式实例，整个视频复用同一个（连续帧共享跟踪状态）
+    with pose_engine.acquire(
         static_image_mode=False,  # 视频模式
         model_complexity=2,
         min_detection_confidence=0.5,
@@ -223,7 +301,7 @@ def process_video(video_path, output_folder, interval=15):
                 print(f"\n处理第{extract_count}个截取帧 (帧号: {frame_count}, 时间: {time_str})")
                 
                 # 处理帧并检测姿态
-                success, landmarks = detect_pose_with_reduced_head(frame.copy(), img_path)
+                success, landmarks = detect_pose_with_reduced_head(frame.copy(), img_path, pose=pose)
                 if success and landmarks:
                     # 获取骨架数据
                     skeleton_data = get_universal_skeleton_coords(landmarks)
@@ -4,6 +4,11 @@ import {
     DrawingUtils
 } from "https://cdn.skypack.dev/@mediapipe/tasks-vision@0.10.0";
 
+// 二进制骨架格式（与服务端pose_wire.py一致）：8字节文件头 + 帧号/时间 + 按固定顺序排列的float32 (x, y, z, visibility)
+const POSE_WIRE_CONTENT_TYPE = 'application/x-pose-frames';
+// 关键点顺序与buildPoseData相同（MediaPipe关键点编号）
+const POSE_WIRE_LANDMARKS = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32];
+
 class PoseDetector {
     constructor() {
         this.poseLandmarker = null;
@@ -21,6 +26,16 @@ class PoseDetector {
         this.backendAvailable = true;
         this.backendRetryCount = 0;
         this.maxRetryCount = 2;
+        // 使用二进制格式发送骨架数据（约为JSON体积的1/5），服务端不支持时自动改回JSON
+        this.useBinaryPayload = true;
+
+        // 实时姿势流（WebSocket长连接，按摄像头帧率发送并接收比对结果）；连接不可用时退回每秒一次的HTTP请求
+        this.streamUrl = 'ws://localhost:5001/ws/pose-stream';
+        this.poseSocket = null;
+        this.streamInterval = 33; // 约30帧/秒
+        this.maxBufferedBytes = 16 * 1024; // 发送缓冲积压超过该值时跳过当前帧
+        this.droppedFrames = 0;
+        this.streamRetryTimer = null;
         
         // 状态显示元素
         this.cameraStatusElement = document.getElementById('cameraStatus');
@@ -97,6 +112,7 @@ class PoseDetector {
         this.frameCount = 0;
         this.startTime = Date.now();
         this.updateStatus('cameraStatus', '启动中...', 'orange');
+        this.openPoseStream();
         
         try {
             // 简化摄像头配置
@@ -137,6 +153,7 @@ class PoseDetector {
         this.webcamRunning = false;
         document.getElementById("webcamButton").innerText = "开启摄像头";
         this.updateStatus('cameraStatus', '已停止', 'gray');
+        this.closePoseStream();
         
         if (this.animationFrameId) {
             cancelAnimationFrame(this.animationFrameId);
@@ -191,14 +208,82 @@ class PoseDetector {
         }
     }
 
+    openPoseStream() {
+        if (this.poseSocket || typeof WebSocket === 'undefined') {
+            return;
+        }
+        const socket = new WebSocket(this.streamUrl);
+        socket.binaryType = 'arraybuffer';
+        socket.onopen = () => {
+            this.poseSocket = socket;
+            this.updateStatus('backendStatus', '实时连接', 'green');
+        };
+        socket.onmessage = (event) => this.handleStreamResult(event.data);
+        socket.onclose = () => {
+            // 连接断开（或服务端未启用姿势流）：退回HTTP发送，摄像头运行中时5秒后重连
+            this.poseSocket = null;
+            if (this.webcamRunning && !this.streamRetryTimer) {
+                this.streamRetryTimer = setTimeout(() => {
+                    this.streamRetryTimer = null;
+                    if (this.webcamRunning) {
+                        this.openPoseStream();
+                    }
+                }, 5000);
+            }
+        };
+        socket.onerror = () => socket.close();
+    }
+
+    closePoseStream() {
+        if (this.streamRetryTimer) {
+            clearTimeout(this.streamRetryTimer);
+            this.streamRetryTimer = null;
+        }
+        if (this.poseSocket) {
+            const socket = this.poseSocket;
+            this.poseSocket = null;
+            socket.close();
+        }
+    }
+
+    handleStreamResult(data) {
+        try {
+            const message = JSON.parse(data);
+            if (message['类型'] === '比对结果') {
+                const match = message['比对结果'];
+                const text = `${match['样本名称']}（${match['相似度分数']}）${match['是否匹配成功'] ? '✓' : ''}`;
+                this.updateStatus('matchResult', text, match['是否匹配成功'] ? 'green' : 'black');
+            } else if (message['类型'] === '错误') {
+                console.warn('姿势流错误:', message['错误信息']);
+            }
+        } catch (error) {
+            console.warn('姿势流消息解析失败:', error);
+        }
+    }
+
     processAndSendResult(result, timestamp) {
         const currentTime = Date.now();
-        if (currentTime - this.lastSendTime < this.sendInterval) {
+        const streaming = this.poseSocket && this.poseSocket.readyState === WebSocket.OPEN;
+        if (currentTime - this.lastSendTime < (streaming ? this.streamInterval : this.sendInterval)) {
+            return;
+        }
+        if (streaming && this.poseSocket.bufferedAmount > this.maxBufferedBytes) {
+            // 背压：网络或服务端跟不上时跳过这一帧，之后发送最新的帧
+            this.droppedFrames++;
             return;
         }
         this.lastSendTime = currentTime;
 
-        const poseData = this.buildPoseData(result, currentTime);
+        if (streaming) {
+            this.frameCount++;
+            this.frameCountElement.textContent = this.frameCount;
+            this.poseSocket.send(this.encodePoseFrame(result, currentTime));
+            return;
+        }
+
+        const poseData = this.useBinaryPayload
+            ? this.encodePoseFrame(result, currentTime)
+            : this.buildPoseData(result, currentTime);
         this.frameCount++;
         this.frameCountElement.textContent = this.frameCount;
 
@@ -234,6 +319,32 @@ class PoseDetector {
         };
     }
 
+    encodePoseFrame(result, currentTime) {
+        const count = POSE_WIRE_LANDMARKS.length;
+        const buffer = new ArrayBuffer(16 + count * 16);
+        const view = new DataView(buffer);
+        // 文件头：魔数"PF"、版本、关键点数、帧数（小端序）
+        view.setUint8(0, 0x50);
+        view.setUint8(1, 0x46);
+        view.setUint8(2, 1);
+        view.setUint8(3, count);
+        view.setUint16(4, 1, true);
+        view.setUint16(6, 0, true);
+        // 帧信息：帧号、时间（秒）
+        view.setUint32(8, this.frameCount, true);
+        view.setFloat32(12, (currentTime - this.startTime) / 1000, true);
+        // 关键点数值与JSON格式相同（缺失的关键点为0）
+        POSE_WIRE_LANDMARKS.forEach((index, i) => {
+            const point = this.getLandmarkData(result.landmarks, index);
+            const offset = 16 + i * 16;
+            view.setFloat32(offset, point.x, true);
+            view.setFloat32(offset + 4, point.y, true);
+            view.setFloat32(offset + 8, point.z, true);
+            view.setFloat32(offset + 12, point.visibility, true);
+        });
+        return buffer;
+    }
+
     getLandmarkData(landmarks, index) {
         if (landmarks && landmarks[0] && landmarks[0][index]) {
             const landmark = landmarks[0][index];
@@ -261,17 +372,21 @@ class PoseDetector {
 
         try {
             // 使用更简单的超时处理
+            const binary = poseData instanceof ArrayBuffer;
             const response = await fetch('http://localhost:5000/api/pose-data', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json',
+                    'Content-Type': binary ? POSE_WIRE_CONTENT_TYPE : 'application/json',
                 },
-                body: JSON.stringify(poseData)
+                body: binary ? poseData : JSON.stringify(poseData)
             });
 
             if (response.ok) {
                 this.backendRetryCount = 0;
                 this.updateStatus('backendStatus', '连接正常', 'green');
+            } else if (binary && (response.status === 400 || response.status === 415)) {
+                // 服务端不支持二进制格式，之后改用JSON发送
+                this.useBinaryPayload = false;
             } else {
                 throw new Error(`HTTP ${response.status}`);
             }
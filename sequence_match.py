@@ -0,0 +1,202 @@
+#动作序列匹配：把一段连续的输入骨架（滑动窗口）与参考动作的时间轴对齐，
+#使用带宽限制的动态时间规整（DTW），先用LB_Keogh下界批量排除不可能更优的起点，再对剩余起点计算DTW并提前放弃
+import sys
+import time
+from collections import deque, namedtuple
+from typing import Dict, List
+
+import numpy as np
+
+from pose_index import squared_distances, pose_vectors
+from skeleton_library import SkeletonFeatures, SkeletonLibrary, pack_skeleton
+
+# start/end: 对齐到的参考帧范围 [start, end)；distance: 每帧平均的DTW距离；names: 参考帧名称
+SequenceMatch = namedtuple("SequenceMatch", ["start", "end", "distance", "names"])
+
+def lb_keogh_envelope(query: np.ndarray, radius: int):
+    """查询序列 (帧数, 维度) 在带宽radius内的上下包络"""
+    padded = np.pad(query, ((radius, radius), (0, 0)), mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=0)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+def lb_keogh(candidates: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    """
+    批量计算LB_Keogh下界：候选 (候选数, 帧数, 维度) 落在包络之外部分的平方距离之和
+    带宽相同时不大于真实的DTW距离，可以安全地排除候选
+    """
+    above = np.maximum(candidates - upper, 0.0)
+    below = np.maximum(lower - candidates, 0.0)
+    return np.sum(above ** 2 + below ** 2, axis=(1, 2))
+
+def padded_distances(query: np.ndarray, reference: np.ndarray, radius: int) -> np.ndarray:
+    """查询与整个参考序列的距离矩阵 (帧数, 参考帧数 + 2*radius)，左右各填充radius列inf；只计算一次，各起点共享"""
+    return np.pad(squared_distances(query, reference), ((0, 0), (radius, radius)), constant_values=np.inf)
+
+def band_costs(dist: np.ndarray, radius: int, starts: np.ndarray) -> np.ndarray:
+    """
+    给定起点的带内局部代价 (起点数, 帧数, 2*radius+1)：第s个起点的 [i, k] 为
+    查询第i帧与参考第 s+i+k-radius 帧的平方欧氏距离（超出候选片段的位置为inf）
+    dist: padded_distances的结果
+    """
+    n = len(dist)
+    i = np.arange(n)
+    k = np.arange(2 * radius + 1)
+    costs = dist[i[None, :, None], starts[:, None, None] + i[None, :, None] + k[None, None, :]]
+    j = i[:, None] + k[None, :] - radius
+    return np.where((j >= 0) & (j < n), costs, np.inf)
+
+def banded_dtw(costs, radius: int, best_so_far: float = np.inf, tail_bounds=None) -> float:
+    """
+    带宽为radius的DTW，costs为一个起点的带内局部代价 (帧数, 2*radius+1)
+    tail_bounds[i]为第i行之后各行代价下界之和；当前行最小累计代价加上它已不小于best_so_far时提前放弃，返回inf
+    """
+    inf = float('inf')
+    costs = costs.tolist() if isinstance(costs, np.ndarray) else costs
+    n = len(costs)
+    width = 2 * radius + 1
+    previous = None
+    for i in range(n):
+        row = [inf] * width
+        for k in range(width):
+            cost = costs[i][k]
+            if cost == inf:
+                continue
+            if i == 0:
+                # 第一行只能从 (0, 0) 出发向右延伸
+                best = 0.0 if k == radius else row[k - 1]
+            else:
+                best = min(previous[k], previous[k + 1] if k + 1 < width else inf,
+                           row[k - 1] if k > 0 else inf)
+            row[k] = cost + best
+        tail = tail_bounds[i] if tail_bounds is not None else 0.0
+        if min(row) + tail >= best_so_far:
+            return inf
+        previous = row
+    return previous[radius]
+
+class SequenceMatcher:
+    """
+    把输入骨架序列与参考动作序列对齐
+    reference: 按时间顺序排列的参考骨架（load_skeletons_from_dir的返回值或SkeletonLibrary）
+    window: 滑动窗口的帧数；radius: DTW带宽（允许的快慢偏差帧数）
+    step: push() 每收到多少帧做一次匹配
+    chunk_size: 每次计算下界的起点数，临时数组的大小为 chunk_size×帧数×维度，与参考序列长度无关
+    """
+    def __init__(self, reference, window: int = 30, radius: int = 3, step: int = 1, metric: str = "weighted",
+                 chunk_size: int = 1024):
+        library = reference if isinstance(reference, SkeletonLibrary) else SkeletonLibrary(reference, metric)
+        self.library = library
+        self.names = library.names
+        self.reference = pose_vectors(library.features, library.metric)
+        self.window = window
+        self.radius = radius
+        self.step = step
+        self.chunk_size = chunk_size
+        self.frames = deque(maxlen=window)
+        self.pending = 0
+        # 剪枝统计：总候选数、被下界排除的数量、DTW计算中途放弃的数量
+        self.candidates = 0
+        self.lb_pruned = 0
+        self.abandoned = 0
+
+    def frame_vectors(self, skeletons: List[Dict]) -> np.ndarray:
+        """输入骨架序列（骨架字典或已打包的 (关键点数, 4) 数组）的特征向量 (帧数, 维度)"""
+        packed = np.stack([skel if isinstance(skel, np.ndarray) else pack_skeleton(skel) for skel in skeletons])
+        return pose_vectors(SkeletonFeatures(packed, self.library.point_idx), self.library.metric)
+
+    def match(self, skeletons: List[Dict]) -> SequenceMatch:
+        """在参考序列的所有起点中找出与输入序列DTW距离最小的一段"""
+        return self.match_vectors(self.frame_vectors(skeletons))
+
+    def match_vectors(self, query: np.ndarray) -> SequenceMatch:
+        n = len(query)
+        if n == 0 or n > len(self.reference):
+            return SequenceMatch(None, None, float('inf'), [])
+
+        candidates = np.lib.stride_tricks.sliding_window_view(self.reference, n, axis=0)
+        candidates = np.moveaxis(candidates, -1, 1)  # (起点数, 帧数, 维度)
+        upper, lower = lb_keogh_envelope(query, self.radius)
+        dist = padded_distances(query, self.reference, self.radius)
+        # 分块计算各起点的下界：每个查询帧至少要与带内的一个参考帧对齐，逐行最小代价之和也是DTW的下界，取两个下界中较大的
+        count = len(candidates)
+        bounds = np.empty(count)
+        row_bounds = np.empty((count, n))
+        for first in range(0, count, self.chunk_size):
+            last = min(first + self.chunk_size, count)
+            row_bounds[first:last] = band_costs(dist, self.radius, np.arange(first, last)).min(axis=2)
+            bounds[first:last] = np.maximum(lb_keogh(candidates[first:last], upper, lower),
+                                            row_bounds[first:last].sum(axis=1))
+
+        # 按下界从小到大计算DTW，下界不小于当前最优时后面的起点都可以跳过
+        best_start, best_distance = None, float('inf')
+        order = np.argsort(bounds)
+        self.candidates += len(order)
+        for rank, start in enumerate(order.tolist()):
+            if bounds[start] >= best_distance:
+                self.lb_pruned += len(order) - rank
+                break
+            # 第i行之后各行的代价下界之和，用于DTW中途放弃
+            tail = np.append(np.cumsum(row_bounds[start, :0:-1])[::-1], 0.0)
+            distance = banded_dtw(band_costs(dist, self.radius, np.array([start]))[0], self.radius,
+                                  best_distance, tail)
+            if distance == float('inf'):
+                self.abandoned += 1
+            elif distance < best_distance:
+                best_start, best_distance = start, distance
+
+        if best_start is None:
+            return SequenceMatch(None, None, float('inf'), [])
+        return SequenceMatch(best_start, best_start + n, best_distance / n,
+                             self.names[best_start:best_start + n])
+
+    def push(self, skel: Dict):
+        """滑动窗口：加入一帧，窗口已满且到达匹配间隔时返回SequenceMatch，否则返回None"""
+        self.frames.append(self.frame_vectors([skel])[0])
+        self.pending += 1
+        if len(self.frames) < self.window or self.pending < self.step:
+            return None
+        self.pending = 0
+        return self.match_vectors(np.stack(self.frames))
+
+    def reset(self):
+        self.frames.clear()
+        self.pending = 0
+
+    def stats(self) -> dict:
+        """剪枝统计"""
+        return {
+            "candidates": self.candidates,
+            "lb_pruned": self.lb_pruned,
+            "abandoned": self.abandoned,
+            "prune_rate": (self.lb_pruned + self.abandoned) / self.candidates if self.candidates else 0.0
+        }
+
+if __name__ == "__main__":
+    # 用法: python sequence_match.py [参考动作文件夹] [窗口帧数]
+    # 从参考序列中截取片段，加入变速和扰动作为输入，测试滑动窗口匹配的耗时和剪枝率
+    from skeleton_dataset import load_skeletons_from_dir
+
+    reference_dir = sys.argv[1] if len(sys.argv) > 1 else "./test_files/video_output"
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    matcher = SequenceMatcher(load_skeletons_from_dir(reference_dir), window=window)
+    if not len(matcher.names):
+        sys.exit("没有找到参考骨架")
+
+    rng = np.random.default_rng(0)
+    start = len(matcher.reference) // 3
+    # 以约0.8倍速重放一段参考动作
+    frames = np.clip(np.round(start + np.arange(window * 4) * 0.8).astype(int), 0, len(matcher.reference) - 1)
+    stream = matcher.reference[frames] + rng.normal(0, 0.002, (len(frames), matcher.reference.shape[1]))
+
+    elapsed = []
+    result = None
+    for vector in stream:
+        matcher.frames.append(vector)
+        if len(matcher.frames) < window:
+            continue
+        t = time.perf_counter()
+        result = matcher.match_vectors(np.stack(matcher.frames))
+        elapsed.append(time.perf_counter() - t)
+    print(f"参考帧数: {len(matcher.reference)}，窗口: {window}帧，带宽: {matcher.radius}")
+    print(f"最后一个窗口对齐到参考帧 [{result.start}, {result.end})（实际约为 [{frames[-window]}, {frames[-1] + 1})）")
+    print(f"每个窗口平均耗时: {np.mean(elapsed) * 1000:.2f}毫秒，剪枝统计: {matcher.stats()}")
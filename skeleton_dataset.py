@@ -0,0 +1,302 @@
+#骨架数据集的二进制列式存储：把一个文件夹中的逐帧骨架JSON合并为一个 帧数×关键点×(x, y, z, visibility) 的数组，
+#启动时用内存映射打开，不再逐个解析JSON；JSON仍作为导入/导出格式
+#JSON文件夹也可以保存一份快照（同样的二进制格式），文件列表和修改时间都没变时直接打开快照
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# 固定的关键点顺序（与posemesh输出的顺序一致，最后是腰部节点）
+LANDMARK_ORDER = [
+    'left_shoulder', 'right_shoulder',
+    'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist',
+    'left_hip', 'right_hip',
+    'left_knee', 'right_knee',
+    'left_ankle', 'right_ankle',
+    'left_heel', 'right_heel',
+    'left_foot_index', 'right_foot_index',
+    'waist'
+]
+FIELDS = ('x', 'y', 'z', 'visibility')
+
+# 数据集是一个文件夹，包含关键点数组和元数据索引两个文件
+ARRAY_FILE = "landmarks.npy"
+INDEX_FILE = "index.json"
+DATASET_VERSION = 1
+# JSON文件夹的快照（需要时开启）保存在单独的缓存文件夹中，不写入样本文件夹
+SNAPSHOT_SUFFIX = ".skeldb"
+
+def is_skeleton_dataset(path: str) -> bool:
+    """判断路径是否为二进制骨架数据集"""
+    return (os.path.isfile(os.path.join(path, ARRAY_FILE)) and
+            os.path.isfile(os.path.join(path, INDEX_FILE)))
+
+def _is_landmark(value) -> bool:
+    return isinstance(value, dict) and all(field in value for field in FIELDS)
+
+class SkeletonDataset:
+    """
+    内存映射的骨架数据集
+    array: 形状为 (帧数, 关键点数, 4) 的数组，缺失的关键点为NaN
+    frames: 每帧的元数据（filename、frame_number、time_seconds等非关键点字段）
+    可以像load_skeletons_from_dir的返回值一样按 (文件名, 骨架字典) 迭代，骨架字典在访问时才生成
+    """
+    def __init__(self, array: np.ndarray, frames: List[Dict], landmarks: List[str] = None, source: str = None):
+        self.array = array
+        self.frames = frames
+        self.landmarks = list(landmarks or LANDMARK_ORDER)
+        self.filenames = [frame['filename'] for frame in frames]
+        self.source = source  # 快照对应的源文件夹状态（见json_dir_key），普通数据集为None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i: int) -> Tuple[str, Dict]:
+        return self.filenames[i], self.to_skeleton(i)
+
+    def __iter__(self):
+        for i in range(len(self.frames)):
+            yield self[i]
+
+    def to_skeleton(self, i: int) -> Dict:
+        """把第i帧还原为与JSON文件相同结构的骨架字典"""
+        skel = {}
+        for name, values in zip(self.landmarks, self.array[i].tolist()):
+            if values[0] != values[0]:  # NaN：该帧没有这个关键点
+                continue
+            skel[name] = dict(zip(FIELDS, values))
+        skel.update(self.frames[i]['meta'])
+        return skel
+
+def skeletons_to_array(skeletons: List[Tuple[str, Dict]], landmarks: List[str] = None,
+                       dtype=np.float64) -> Tuple[np.ndarray, List[Dict]]:
+    """把 [(文件名, 骨架字典), ...] 打包为关键点数组和元数据列表"""
+    landmarks = list(landmarks or LANDMARK_ORDER)
+    position = {name: j for j, name in enumerate(landmarks)}
+    array = np.full((len(skeletons), len(landmarks), len(FIELDS)), np.nan, dtype=dtype)
+    frames = []
+    for i, (filename, skel) in enumerate(skeletons):
+        meta = {}
+        for key, value in skel.items():
+            if key in position and _is_landmark(value):
+                array[i, position[key]] = [value[field] for field in FIELDS]
+            else:
+                # 标签字段以及不在固定顺序中的数据原样保存在元数据中
+                meta[key] = value
+        frames.append({
+            "filename": filename,
+            "frame_number": skel.get("frame_number"),
+            "time_seconds": skel.get("time_seconds"),
+            "meta": meta
+        })
+    return array, frames
+
+def _load_json_dir(dir_path: str) -> List[Tuple[str, Dict]]:
+    """按文件名顺序读取文件夹中的所有骨架JSON"""
+    skeletons = []
+    for filename in sorted(os.listdir(dir_path)):
+        if filename.endswith('.json'):
+            with open(os.path.join(dir_path, filename), 'r', encoding='utf-8') as f:
+                skeletons.append((filename, json.load(f)))
+    return skeletons
+
+def export_skeleton_dataset(skeletons, dataset_path: str, dtype=np.float64, source: str = None,
+                            verbose: bool = True) -> int:
+    """
+    导出二进制数据集
+    skeletons: 骨架JSON文件夹路径，或 [(文件名, 骨架字典), ...] 列表
+    dataset_path: 输出的数据集文件夹
+    dtype: 默认float64，与JSON中的数值完全一致；float32体积减半但有精度损失
+    source: 写入索引的源文件夹状态（快照使用）
+    返回导出的帧数
+    """
+    if isinstance(skeletons, str):
+        skeletons = _load_json_dir(skeletons)
+    array, frames = skeletons_to_array(skeletons, dtype=dtype)
+
+    os.makedirs(dataset_path, exist_ok=True)
+    np.save(os.path.join(dataset_path, ARRAY_FILE), array)
+    with open(os.path.join(dataset_path, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            "version": DATASET_VERSION,
+            "landmarks": LANDMARK_ORDER,
+            "fields": list(FIELDS),
+            "frames": frames,
+            "source": source
+        }, f, ensure_ascii=False)
+    if verbose:
+        print(f"已导出 {len(frames)} 帧骨架数据至: {dataset_path}")
+    return len(frames)
+
+def load_skeleton_dataset(dataset_path: str) -> SkeletonDataset:
+    """内存映射打开二进制数据集（只读，数据在访问时才从磁盘读入）"""
+    with open(os.path.join(dataset_path, INDEX_FILE), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get("version") != DATASET_VERSION:
+        raise ValueError(f"不支持的数据集版本: {index.get('version')}")
+    array = np.load(os.path.join(dataset_path, ARRAY_FILE), mmap_mode='r')
+    return SkeletonDataset(array, index["frames"], index["landmarks"], index.get("source"))
+
+# ----------------------
+# JSON文件夹的启动快照
+# ----------------------
+def json_file_stamps(dir_path: str) -> Dict[str, Tuple[int, int]]:
+    """文件夹中每个骨架JSON的 (修改时间, 文件大小)"""
+    stamps = {}
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.json'):
+                stat = entry.stat()
+                stamps[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+def json_dir_key(stamps: Dict[str, Tuple[int, int]]) -> str:
+    """由文件列表和每个文件的修改时间、大小得到文件夹状态的摘要，任何文件增删改都会改变它"""
+    digest = hashlib.sha1()
+    for filename in sorted(stamps):
+        mtime, size = stamps[filename]
+        digest.update(f"{filename}\0{mtime}\0{size}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def snapshot_path(dir_path: str, cache_dir: str) -> str:
+    """JSON文件夹在缓存文件夹中的快照路径（以文件夹名加绝对路径的摘要命名，不同位置的同名文件夹互不覆盖）"""
+    real_path = os.path.realpath(dir_path)
+    digest = hashlib.sha1(real_path.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.basename(real_path) or 'root'}-{digest}{SNAPSHOT_SUFFIX}")
+
+def load_snapshot(dir_path: str, stamps: Dict[str, Tuple[int, int]], cache_dir: str):
+    """快照与文件夹当前状态一致时返回快照中的SkeletonDataset，否则（没有快照、已过期或损坏）返回None"""
+    snapshot = snapshot_path(dir_path, cache_dir)
+    if not is_skeleton_dataset(snapshot):
+        return None
+    try:
+        dataset = load_skeleton_dataset(snapshot)
+    except (OSError, ValueError) as e:
+        print(f"读取快照 {snapshot} 失败: {e}")
+        return None
+    if dataset.source != json_dir_key(stamps) or len(dataset) != len(stamps):
+        return None
+    return dataset
+
+def save_snapshot(dir_path: str, skeletons: List[Tuple[str, Dict]], stamps: Dict[str, Tuple[int, int]],
+                  cache_dir: str) -> bool:
+    """
+    把已解析的骨架保存为文件夹的快照（保存在cache_dir中），stamps为解析前取得的文件状态
+    （解析期间文件有变化时快照会在下次启动时失效）；先写入临时文件夹再替换，写入失败时只打印提示
+    """
+    snapshot = snapshot_path(dir_path, cache_dir)
+    temp_path = f"{snapshot}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        export_skeleton_dataset(skeletons, temp_path, source=json_dir_key(stamps), verbose=False)
+        shutil.rmtree(snapshot, ignore_errors=True)
+        os.replace(temp_path, snapshot)
+        return True
+    except OSError as e:
+        print(f"保存快照 {snapshot} 失败: {e}")
+        shutil.rmtree(temp_path, ignore_errors=True)
+        return False
+
+# ----------------------
+# 加载骨架JSON文件夹（match.py、camread/match.py、热更新共用）
+# ----------------------
+def load_skeleton(file_path: str) -> Dict:
+    """加载单个骨架数据文件"""
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"加载文件 {file_path} 失败: {e}")
+        return None
+
+def load_skeleton_files(dir_path: str, filenames: List[str], workers: int = None) -> List[Tuple[str, Dict]]:
+    """用线程池并行读取文件夹中的多个骨架文件，按filenames的顺序返回 [(文件名, 骨架字典), ...]，读取失败的为None"""
+    paths = [os.path.join(dir_path, filename) for filename in filenames]
+    # 线程主要重叠文件读取的等待，JSON解析仍受GIL限制；单核时直接顺序读取
+    if workers is None:
+        workers = min(8, os.cpu_count() or 1)
+    if workers <= 1 or len(paths) < 2:
+        return list(zip(filenames, map(load_skeleton, paths)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(zip(filenames, pool.map(load_skeleton, paths)))
+
+def load_skeletons_from_dir(dir_path: str, snapshot_dir: str = None, workers: int = None) -> SkeletonDataset:
+    """
+    从文件夹加载所有骨架数据（仅处理.json文件）
+    返回SkeletonDataset：可以按 (文件名, 骨架字典) 迭代，也可以直接交给SkeletonLibrary/match_many（不再重复打包）
+    snapshot_dir: 快照缓存文件夹；设置后保存JSON文件夹的解析结果，文件没有变化时下次直接打开快照。
+                  默认不使用快照，不会在样本文件夹中写入任何文件
+    """
+    # 二进制骨架数据集直接内存映射打开，无需逐个解析JSON
+    if is_skeleton_dataset(dir_path):
+        return load_skeleton_dataset(dir_path)
+
+    skeletons = []
+    if not os.path.exists(dir_path):
+        print(f"文件夹 {dir_path} 不存在")
+        return SkeletonDataset(*skeletons_to_array(skeletons))
+
+    # 文件列表和修改时间与上次保存的快照一致时直接打开快照，跳过JSON解析
+    stamps = json_file_stamps(dir_path)
+    if snapshot_dir:
+        cached = load_snapshot(dir_path, stamps, snapshot_dir)
+        if cached is not None:
+            return cached
+
+    for filename, skel in load_skeleton_files(dir_path, sorted(stamps), workers):
+        if skel:
+            skeletons.append((filename, skel))  # 保留文件名用于结果输出
+    # 全部文件都解析成功时才保存快照（有文件正在写入时下次重新解析）
+    if snapshot_dir and skeletons and len(skeletons) == len(stamps):
+        save_snapshot(dir_path, skeletons, stamps, snapshot_dir)
+    return SkeletonDataset(*skeletons_to_array(skeletons))
+
+def export_dataset_to_json(dataset_path: str, output_dir: str) -> int:
+    """把二进制数据集还原为逐帧JSON文件（格式与posemesh输出一致）"""
+    dataset = load_skeleton_dataset(dataset_path)
+    os.makedirs(output_dir, exist_ok=True)
+    for filename, skel in dataset:
+        with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(skel, f, ensure_ascii=False, indent=2)
+    print(f"已还原 {len(dataset)} 个骨架JSON至: {output_dir}")
+    return len(dataset)
+
+if __name__ == "__main__":
+    # 用法: python skeleton_dataset.py [JSON文件夹] [数据集文件夹]
+    json_dir = sys.argv[1] if len(sys.argv) > 1 else "./test_files/video_output"
+    dataset_path = sys.argv[2] if len(sys.argv) > 2 else json_dir.rstrip("/\\") + ".skeldb"
+
+    export_skeleton_dataset(json_dir, dataset_path)
+
+    # 对比两种格式的加载耗时
+    start = time.perf_counter()
+    _load_json_dir(json_dir)
+    json_time = time.perf_counter() - start
+    start = time.perf_counter()
+    load_skeleton_dataset(dataset_path)
+    dataset_time = time.perf_counter() - start
+    print(f"逐个解析JSON: {json_time * 1000:.1f}毫秒，打开数据集: {dataset_time * 1000:.1f}毫秒")
+
+    # 对比JSON文件夹的启动耗时：线程池并行解析（冷启动，没有快照，解析后保存快照）与打开快照（热启动）
+    import tempfile
+
+    cache_dir = tempfile.mkdtemp(prefix="skeldb-")
+    start = time.perf_counter()
+    load_skeletons_from_dir(json_dir)
+    parallel_time = time.perf_counter() - start
+    start = time.perf_counter()
+    load_skeletons_from_dir(json_dir, snapshot_dir=cache_dir)
+    cold_time = time.perf_counter() - start
+    start = time.perf_counter()
+    warm = load_skeletons_from_dir(json_dir, snapshot_dir=cache_dir)
+    warm_time = time.perf_counter() - start
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    print(f"并行解析JSON: {parallel_time * 1000:.1f}毫秒，冷启动（并行解析并保存快照）: {cold_time * 1000:.1f}毫秒，"
+          f"热启动（打开快照）: {warm_time * 1000:.1f}毫秒（{'命中' if warm.source else '未命中'}）")
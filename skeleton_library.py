@@ -0,0 +1,478 @@
+#骨架样本库的向量化比对：加载时把参考骨架一次性打包为连续数组，
+#之后每个输入骨架（或一批输入）只需几次数组运算就能与整个样本库打分，评分与match.py中逐个计算的结果一致
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import skeleton_metrics
+from skeleton_dataset import LANDMARK_ORDER, SkeletonDataset, skeletons_to_array
+
+LANDMARK_INDEX = {name: j for j, name in enumerate(LANDMARK_ORDER)}
+
+# weighted评分的关键点权重（躯干 > 四肢 > 末端），见skeleton_metrics
+WEIGHTED_W = np.array(list(skeleton_metrics.WEIGHTED_POINTS.values()))
+
+# 躯干平面（左肩、右肩、右髋）和默认法向量
+TORSO_IDX = np.array([LANDMARK_INDEX['left_shoulder'], LANDMARK_INDEX['right_shoulder'],
+                      LANDMARK_INDEX['right_hip']])
+DEFAULT_NORMAL = np.array([0.0, 1.0, 0.0])
+
+# 腰部节点的计算权重（与posemesh.compute_waist_node一致）
+WAIST_IDX = np.array([LANDMARK_INDEX[p] for p in ('left_shoulder', 'right_shoulder', 'left_hip', 'right_hip')])
+WAIST_W = np.array([0.66, 0.66, 0.33, 0.33]) / 1.98
+
+# ----------------------
+# 打包
+# ----------------------
+def pack_skeleton(skel: Dict) -> np.ndarray:
+    """把一个骨架字典打包为 (关键点数, 4) 的数组，缺失的关键点为NaN"""
+    array = np.full((len(LANDMARK_ORDER), 4), np.nan)
+    for name, j in LANDMARK_INDEX.items():
+        point = skel.get(name)
+        if isinstance(point, dict):
+            array[j] = (point['x'], point['y'], point['z'], point['visibility'])
+    return array
+
+def pack_skeletons(skeletons) -> Tuple[List[str], np.ndarray]:
+    """把 [(文件名, 骨架字典), ...] 或 SkeletonDataset 打包为 (文件名列表, (样本数, 关键点数, 4)数组)"""
+    if isinstance(skeletons, SkeletonDataset):
+        return list(skeletons.filenames), np.asarray(skeletons.array, dtype=np.float64)
+    array, frames = skeletons_to_array(list(skeletons))
+    return [frame['filename'] for frame in frames], array
+
+# ----------------------
+# 派生特征（参考骨架在加载时计算一次，输入骨架在每次比对时计算）
+# ----------------------
+def torso_normals(array: np.ndarray) -> np.ndarray:
+    """批量计算躯干法向量 (..., 3)，与calculate_skeleton_normal一致：关键点缺失/可见度低/退化时为(0, 1, 0)"""
+    torso = array[..., TORSO_IDX, :]
+    valid = np.all(torso[..., 3] >= 0.6, axis=-1)  # NaN比较为False，缺失的点同样无效
+    a, b, c = torso[..., 0, :3], torso[..., 1, :3], torso[..., 2, :3]
+    normal = np.cross(b - a, c - a)
+    norm = np.sqrt(np.sum(normal ** 2, axis=-1))
+    valid &= norm >= 1e-6
+    with np.errstate(invalid='ignore', divide='ignore'):
+        normal = normal / norm[..., None]
+    return np.where(valid[..., None], normal, DEFAULT_NORMAL)
+
+def waist_nodes(array: np.ndarray) -> np.ndarray:
+    """腰部节点 (..., 4)：优先使用数据中已有的waist，缺失时按posemesh.compute_waist_node的权重由肩、髋计算"""
+    computed = np.einsum('k,...kc->...c', WAIST_W, array[..., WAIST_IDX, :3])
+    visibility = np.mean(array[..., WAIST_IDX, 3], axis=-1)
+    computed = np.concatenate([computed, visibility[..., None]], axis=-1)
+    stored = array[..., LANDMARK_INDEX['waist'], :]
+    return np.where(np.isnan(stored[..., :1]), computed, stored)
+
+# 评分内核用到的特征
+SCORE_FIELDS = ('points', 'visibility', 'present', 'normals')
+
+class SkeletonFeatures:
+    """
+    一组骨架（任意前置维度）的派生特征
+    points/visibility/present: 按评分所用关键点取出的坐标、可见度和"关键点存在"掩码
+    normals: 躯干法向量
+    waist: 腰部节点，评分内核不使用（只有pose_index的向量编码用到），第一次访问时才计算
+    """
+    def __init__(self, array: np.ndarray, idx: np.ndarray):
+        selected = array[..., idx, :]
+        self.points = np.ascontiguousarray(selected[..., :3])
+        self.visibility = np.ascontiguousarray(selected[..., 3])
+        self.present = ~np.isnan(selected[..., 0])
+        self.normals = torso_normals(array)
+        self._array = array
+        self._waist = None
+
+    @property
+    def waist(self) -> np.ndarray:
+        if self._waist is None:
+            self._waist = waist_nodes(self._array)
+        return self._waist
+
+    def subset(self, indices, fields=None) -> "SkeletonFeatures":
+        """
+        按第一维取出部分骨架的特征（用于只对候选样本做精确评分）
+        fields: 限定只复制这些特征（如SCORE_FIELDS），不含"waist"时取出的部分不能再计算腰部节点
+        """
+        part = SkeletonFeatures.__new__(SkeletonFeatures)
+        for name in SCORE_FIELDS:
+            if fields is None or name in fields:
+                setattr(part, name, getattr(self, name)[indices])
+        part._array = part._waist = None
+        if fields is None or 'waist' in fields:
+            part._array = self._array[indices]
+            if self._waist is not None:
+                part._waist = self._waist[indices]
+        return part
+
+# ----------------------
+# 批量评分内核（输入和样本的特征可以带任意前置维度，按广播规则计算）
+# ----------------------
+def _point_distances(a: SkeletonFeatures, b: SkeletonFeatures):
+    """选定关键点的3D距离、可见度权重和"两边都存在"的掩码"""
+    present = a.present & b.present
+    vis_weight = 0.5 + 0.5 * np.minimum(a.visibility, b.visibility)
+    diff = a.points - b.points
+    dist = np.sqrt(np.einsum('...c,...c->...', diff, diff))
+    return dist, vis_weight, present
+
+def weighted_scores(inputs: SkeletonFeatures, refs: SkeletonFeatures) -> np.ndarray:
+    """camread/match.py 的综合评分：0.6 * 加权关键点距离 + 0.4 * 0.1 * 躯干法向量夹角"""
+    dist, vis_weight, present = _point_distances(inputs, refs)
+    weight = np.where(present, WEIGHTED_W * vis_weight, 0.0)
+    total_distance = np.sum(np.where(present, dist * WEIGHTED_W * vis_weight, 0.0), axis=-1)
+    total_weight = np.sum(weight, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_distance = np.where(total_weight > 0, total_distance / total_weight, np.inf)
+
+    dot = np.sum(inputs.normals * refs.normals, axis=-1)
+    angle = np.arccos(np.clip(dot, -1.0, 1.0))
+    return 0.6 * avg_distance + 0.4 * (angle * 0.1)
+
+def average_scores(inputs: SkeletonFeatures, refs: SkeletonFeatures) -> np.ndarray:
+    """match.py 的评分：16个关键点（可见度加权）距离的平均值，不使用法向量"""
+    dist, vis_weight, present = _point_distances(inputs, refs)
+    total_distance = np.sum(np.where(present, dist * vis_weight, 0.0), axis=-1)
+    valid_points = np.sum(present, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid_points > 0, total_distance / valid_points, np.inf)
+
+# ----------------------
+# 评分下界（只用评分关键点的加权中心和法向量，每个样本只需几次运算，且保证不大于完整评分）
+# 可见度权重 0.5 + 0.5 * min(visibility) 在 [0.5, 1] 之间，因此平均距离不小于 0.5 * Σ w·d / Σ w，
+# 由三角不等式 Σ w·d / Σ w 又不小于两个骨架加权中心之间的距离；有关键点缺失时中心不可比较，距离项取0
+# ----------------------
+def point_centroids(features: SkeletonFeatures, weights: np.ndarray) -> np.ndarray:
+    """评分关键点的加权中心 (..., 3)，有关键点缺失时为NaN"""
+    return np.einsum('p,...pc->...c', weights / weights.sum(), features.points)
+
+def lower_bounds(metric: "Metric", inputs: SkeletonFeatures, refs: SkeletonFeatures,
+                 input_centroid: np.ndarray, ref_centroids: np.ndarray) -> np.ndarray:
+    """distance_scale * 0.5 * 中心距离 + 法向量夹角项（与完整评分中的夹角项相同）"""
+    diff = input_centroid - ref_centroids
+    shift = np.sqrt(np.einsum('...c,...c->...', diff, diff))
+    bounds = metric.distance_scale * 0.5 * np.where(np.isnan(shift), 0.0, shift)
+    if metric.normal_weight:
+        dot = np.sum(inputs.normals * refs.normals, axis=-1)
+        bounds = bounds + metric.normal_weight * np.arccos(np.clip(dot, -1.0, 1.0))
+    return bounds
+
+# ----------------------
+# 评分方式注册表：每种评分方式同时提供逐点参考实现和批量数组内核，按名称选择
+# ----------------------
+Metric = namedtuple("Metric", [
+    "name",             # 名称
+    "scalar",           # 逐点参考实现 scalar(input_skel, sample_skel) -> float
+    "kernel",           # 批量数组内核 kernel(inputs: SkeletonFeatures, refs: SkeletonFeatures) -> ndarray
+    "points",           # 评分使用的关键点名称
+    "point_idx",        # 关键点在LANDMARK_ORDER中的位置
+    "point_weights",    # 关键点权重（用于特征向量和下界）
+    "distance_scale",   # 距离项在评分中的系数
+    "normal_weight",    # 法向量夹角（弧度）在评分中的系数，0表示不使用
+    "threshold",        # 默认匹配阈值（评分低于该值视为匹配成功）
+    "description"
+])
+
+METRICS: Dict[str, Metric] = {}
+
+def register_metric(name: str, scalar, kernel, points, point_weights=None, distance_scale: float = 1.0,
+                    normal_weight: float = 0.0, threshold: float = 0.2, description: str = "") -> Metric:
+    """
+    注册一种评分方式，之后SkeletonLibrary、ActionAgent、match.py和camread都可以按名称使用
+    kernel必须与scalar逐对给出相同的评分（可用check_metric_parity校验）；
+    下界剪枝要求评分不小于 distance_scale * 可见度加权平均距离 + normal_weight * 法向量夹角
+    """
+    points = list(points)
+    weights = np.ones(len(points)) if point_weights is None else np.asarray(point_weights, dtype=np.float64)
+    metric = Metric(name, scalar, kernel, points, np.array([LANDMARK_INDEX[p] for p in points]),
+                    weights, distance_scale, normal_weight, threshold, description)
+    METRICS[name] = metric
+    return metric
+
+def get_metric(name) -> Metric:
+    """按名称取出评分方式（也可以直接传入Metric）"""
+    if isinstance(name, Metric):
+        return name
+    if name not in METRICS:
+        raise ValueError(f"未知的评分方式: {name}，可选: {list(METRICS)}")
+    return METRICS[name]
+
+register_metric("weighted", skeleton_metrics.weighted_similarity, weighted_scores,
+                skeleton_metrics.WEIGHTED_POINTS, WEIGHTED_W, distance_scale=0.6, normal_weight=0.4 * 0.1,
+                threshold=0.2, description="12个关键点加权距离 + 躯干法向量夹角（camread/match.py、match2.py）")
+register_metric("average", skeleton_metrics.average_similarity, average_scores,
+                skeleton_metrics.AVERAGE_POINTS, threshold=0.15,
+                description="16个关键点可见度加权距离的平均值（match.py、action_agent.py）")
+
+# 下界与评分的计算顺序不同，比较时留出浮点误差的余量
+BOUND_EPSILON = 1e-12
+
+# ----------------------
+# 样本库
+# ----------------------
+class SkeletonLibrary:
+    """
+    打包好的参考骨架库，评分用到的派生特征（关键点坐标、可见度、躯干法向量）在构造时一次算好，
+    之后每次比对只需计算输入骨架一侧的特征；腰部节点只有pose_index用到，第一次访问时才计算
+    skeletons: load_skeletons_from_dir 的返回值（SkeletonDataset）或 [(文件名, 骨架字典), ...]
+    metric: 评分方式名称（见METRICS注册表，"weighted"或"average"等）
+    """
+    def __init__(self, skeletons, metric: str = "weighted", prune: bool = True, block_size: int = 64):
+        self.metric_spec = get_metric(metric)
+        self.metric = self.metric_spec.name
+        self.kernel = self.metric_spec.kernel
+        self.point_idx = self.metric_spec.point_idx
+        self.names, self.array = pack_skeletons(skeletons)
+        self.features = SkeletonFeatures(self.array, self.point_idx)
+        # 下界剪枝：best_match先对下界最小的block_size个样本计算完整评分，其余样本下界超过当前最优的直接跳过
+        self.prune = prune
+        self.block_size = block_size
+        self.centroids = point_centroids(self.features, self.metric_spec.point_weights)
+        # 剪枝统计（多个请求线程共用同一个样本库，计数时加锁）
+        self.queries = 0
+        self.evaluated = 0
+        self.skipped = 0
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_array(cls, names: List[str], array: np.ndarray, metric: str = "weighted") -> "SkeletonLibrary":
+        """由已打包的 (样本数, 关键点数, 4) 数组直接构造样本库"""
+        return cls(SkeletonDataset(array, [{"filename": name} for name in names]), metric)
+
+    def __len__(self):
+        return len(self.names)
+
+    def input_features(self, input_skels) -> SkeletonFeatures:
+        """输入骨架一侧的特征：单个骨架字典或已打包的 (关键点数, 4) 数组，或骨架字典列表（结果带一个批量维度）"""
+        if isinstance(input_skels, dict):
+            return SkeletonFeatures(pack_skeleton(input_skels), self.point_idx)
+        if isinstance(input_skels, np.ndarray):
+            return SkeletonFeatures(np.asarray(input_skels, dtype=np.float64), self.point_idx)
+        inputs = np.stack([pack_skeleton(skel) for skel in input_skels]) if input_skels else \
+            np.empty((0, len(LANDMARK_ORDER), 4))
+        # 增加样本维度，与 (样本数, ...) 的参考特征广播为 (输入数, 样本数)
+        return SkeletonFeatures(inputs[:, None], self.point_idx)
+
+    def scores(self, input_skel: Dict) -> np.ndarray:
+        """输入骨架与每个样本的评分 (样本数,)，值越小越相似"""
+        return self.kernel(self.input_features(input_skel), self.features)
+
+    def scores_many(self, input_skels: List[Dict]) -> np.ndarray:
+        """一批输入骨架与每个样本的评分矩阵 (输入数, 样本数)"""
+        return self.kernel(self.input_features(list(input_skels)), self.features)
+
+    def scores_array(self, inputs: np.ndarray) -> np.ndarray:
+        """已打包的输入 (输入数, 关键点数, 4) 与每个样本的评分矩阵 (输入数, 样本数)"""
+        return self.kernel(SkeletonFeatures(inputs[:, None], self.point_idx), self.features)
+
+    def best_match(self, input_skel: Dict, prune: bool = None) -> Tuple[str, float]:
+        """
+        返回 (最佳匹配的样本名, 评分)，与逐个比较的find_best_match结果一致（剪枝不改变结果）
+        input_skel: 骨架字典，或已打包的 (关键点数, 4) 数组（如二进制传输格式解码后的一帧）
+        """
+        if not self.names:
+            return None, float('inf')
+        inputs = self.input_features(input_skel)
+        if self.prune if prune is None else prune:
+            best, best_score = self._pruned_best(inputs)
+        else:
+            scores = self.kernel(inputs, self.features)
+            best = int(np.argmin(scores))
+            best_score = scores[best]
+            self._count(len(scores), 0)
+        if not np.isfinite(best_score):
+            return None, float('inf')
+        return self.names[best], float(best_score)
+
+    def _pruned_best(self, inputs: SkeletonFeatures) -> Tuple[int, float]:
+        bounds = lower_bounds(self.metric_spec, inputs, self.features,
+                              point_centroids(inputs, self.metric_spec.point_weights), self.centroids)
+        count = len(bounds)
+        # 先对下界最小的一块样本计算完整评分，得到当前最优
+        if count > self.block_size:
+            seeds = np.argpartition(bounds, self.block_size)[:self.block_size]
+        else:
+            seeds = np.arange(count)
+        seed_scores = self.kernel(inputs, self.features.subset(seeds, SCORE_FIELDS))
+        threshold = seed_scores.min() + BOUND_EPSILON
+
+        # 其余样本中只有下界不超过当前最优的才可能更好，一次性计算它们的完整评分
+        remaining = np.ones(count, dtype=bool)
+        remaining[seeds] = False
+        rest = np.flatnonzero(remaining & (bounds <= threshold))
+        rest_scores = self.kernel(inputs, self.features.subset(rest, SCORE_FIELDS))
+
+        indices = np.concatenate([seeds, rest])
+        scores = np.concatenate([seed_scores, rest_scores])
+        self._count(len(indices), count - len(indices))
+
+        best_score = scores.min()
+        if not np.isfinite(best_score):
+            # 所有评分都是inf（没有可比较的关键点）
+            return 0, float('inf')
+        # 评分相同时取下标最小的样本，与完整扫描的argmin一致
+        return int(indices[scores == best_score].min()), best_score
+
+    def _count(self, evaluated: int, skipped: int):
+        with self._stats_lock:
+            self.queries += 1
+            self.evaluated += evaluated
+            self.skipped += skipped
+
+    def prune_stats(self) -> dict:
+        """剪枝统计：查询次数、计算完整评分的样本数、被下界跳过的样本数和跳过比例"""
+        with self._stats_lock:
+            queries, evaluated, skipped = self.queries, self.evaluated, self.skipped
+        total = evaluated + skipped
+        return {
+            "queries": queries,
+            "evaluated": evaluated,
+            "skipped": skipped,
+            "skip_rate": skipped / total if total else 0.0
+        }
+
+# ----------------------
+# N×M 批量匹配
+# ----------------------
+MatchResults = namedtuple("MatchResults", ["names", "scores", "best_index", "best_names", "best_scores"])
+
+_worker_library = None
+
+def _init_match_worker(names, array, metric):
+    # 每个子进程只接收并打包一次样本库
+    global _worker_library
+    _worker_library = SkeletonLibrary.from_array(names, array, metric)
+
+def _score_chunk(inputs: np.ndarray, keep_scores: bool):
+    scores = _worker_library.scores_array(inputs)
+    return scores if keep_scores else (np.argmin(scores, axis=1), np.min(scores, axis=1))
+
+def match_many(inputs, library: SkeletonLibrary, workers: int = None, chunk_size: int = 256,
+               keep_scores: bool = True) -> MatchResults:
+    """
+    一批输入骨架与整个样本库的N×M匹配
+    inputs: [骨架字典, ...]、[(文件名, 骨架字典), ...] 或 SkeletonDataset
+    workers: 进程数，默认输入不超过两个分块时在当前进程计算，否则使用全部CPU核
+    chunk_size: 每个分块的输入数（分块评分矩阵为 chunk_size×样本数）
+    keep_scores: 为False时不保留完整评分矩阵（scores为None），只返回每个输入的最佳匹配，节省内存
+    返回MatchResults：names为输入名称，best_index/best_names/best_scores为每个输入的最佳匹配，
+    没有可比较关键点的输入 best_index 为-1、best_names 为None、best_scores 为inf
+    """
+    if isinstance(inputs, SkeletonDataset):
+        names, packed = list(inputs.filenames), np.asarray(inputs.array, dtype=np.float64)
+    else:
+        inputs = list(inputs)
+        if inputs and isinstance(inputs[0], tuple):
+            names, skels = [name for name, _ in inputs], [skel for _, skel in inputs]
+        else:
+            names, skels = list(range(len(inputs))), inputs
+        packed = np.stack([pack_skeleton(skel) for skel in skels]) if skels else \
+            np.empty((0, len(LANDMARK_ORDER), 4))
+
+    chunks = [packed[start:start + chunk_size] for start in range(0, len(packed), chunk_size)]
+    if workers is None:
+        workers = 1 if len(chunks) <= 2 else os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+
+    if not len(library):
+        results = [np.full((len(chunk), 0), np.inf) if keep_scores else
+                   (np.full(len(chunk), -1), np.full(len(chunk), np.inf)) for chunk in chunks]
+    elif workers == 1:
+        results = [library.scores_array(chunk) for chunk in chunks]
+        if not keep_scores:
+            results = [(np.argmin(r, axis=1), np.min(r, axis=1)) for r in results]
+    else:
+        # 使用spawn启动子进程，与posemesh的并行处理保持一致
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_match_worker,
+                                 initargs=(library.names, np.asarray(library.array), library.metric)) as executor:
+            results = list(executor.map(_score_chunk, chunks, [keep_scores] * len(chunks)))
+
+    if keep_scores:
+        scores = np.concatenate(results) if results else np.empty((0, len(library)))
+        if len(library):
+            best_index = np.argmin(scores, axis=1)
+            best_scores = scores[np.arange(len(scores)), best_index]
+        else:
+            best_index, best_scores = np.full(len(scores), -1), np.full(len(scores), np.inf)
+    else:
+        scores = None
+        best_index = np.concatenate([r[0] for r in results]) if results else np.empty(0, dtype=np.int64)
+        best_scores = np.concatenate([r[1] for r in results]) if results else np.empty(0)
+
+    # 所有样本都无法比较（评分为inf）时视为没有匹配
+    best_index = np.where(np.isfinite(best_scores), best_index, -1)
+    best_names = [library.names[i] if i >= 0 else None for i in best_index.tolist()]
+    return MatchResults(names, scores, best_index, best_names, best_scores)
+
+# ----------------------
+# 批量内核与参考实现的一致性校验
+# ----------------------
+def check_metric_parity(name, samples, inputs=None, tolerance: float = 1e-9) -> dict:
+    """
+    对每一对 (输入, 样本) 分别用逐点参考实现和批量内核评分并比较
+    samples: [(文件名, 骨架字典), ...]；inputs: 输入骨架字典列表，默认使用样本本身
+    返回最大绝对误差、无法比较（inf）的位置和最佳匹配是否一致
+    """
+    metric = get_metric(name)
+    samples = list(samples)
+    inputs = [skel for _, skel in samples] if inputs is None else list(inputs)
+    library = SkeletonLibrary(samples, metric)
+    batched = library.scores_many(inputs)
+    scalar = np.array([[metric.scalar(skel, sample) for _, sample in samples] for skel in inputs])
+    scalar = scalar.reshape(batched.shape)
+
+    finite = np.isfinite(scalar)
+    inf_agree = bool(np.array_equal(finite, np.isfinite(batched)))
+    max_diff = float(np.max(np.abs(batched[finite] - scalar[finite]))) if finite.any() else 0.0
+    best_agree = True
+    for skel, row in zip(inputs, scalar):
+        expected = samples[int(np.argmin(row))][0] if finite.size and np.isfinite(row).any() else None
+        best_agree &= library.best_match(skel)[0] == expected
+    return {
+        "metric": metric.name,
+        "pairs": int(scalar.size),
+        "max_diff": max_diff,
+        "inf_agree": inf_agree,
+        "best_agree": bool(best_agree),
+        "ok": inf_agree and best_agree and max_diff <= tolerance
+    }
+
+if __name__ == "__main__":
+    # 用法: python skeleton_library.py [样本文件夹] [样本数]
+    # 对所有已注册的评分方式做一致性校验：输入为随机扰动、随机去掉部分关键点的样本
+    import copy
+    import random
+    import sys
+
+    from skeleton_dataset import load_skeletons_from_dir
+
+    sample_dir = sys.argv[1] if len(sys.argv) > 1 else "./test_files/video_output"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    samples = sorted(load_skeletons_from_dir(sample_dir), key=lambda item: item[0])[:count]
+    if not samples:
+        sys.exit("没有找到样本骨架")
+
+    random.seed(0)
+    inputs = [{}]
+    for _, skel in random.sample(samples, min(len(samples), 50)):
+        skel = copy.deepcopy(skel)
+        for value in skel.values():
+            if isinstance(value, dict):
+                value['x'] += random.gauss(0, 0.02)
+                value['visibility'] = random.random()
+        for point in random.sample(LANDMARK_ORDER, random.randint(0, 3)):
+            skel.pop(point, None)
+        inputs.append(skel)
+
+    failed = False
+    for name, metric in METRICS.items():
+        result = check_metric_parity(name, samples, inputs)
+        failed |= not result["ok"]
+        print(f"{name}（{metric.description}）: {'一致' if result['ok'] else '不一致'}，"
+              f"{result['pairs']}对，最大误差 {result['max_diff']:.3e}")
+    sys.exit(1 if failed else 0)
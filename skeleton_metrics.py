@@ -0,0 +1,132 @@
+#骨架相似度评分的逐点参考实现（纯Python，与skeleton_library中的批量数组内核一一对应）
+#weighted: camread/match.py（以及match2.py）的加权关键点距离 + 躯干法向量夹角
+#average: match.py 的16个关键点平均距离
+import math
+from typing import Dict, Tuple
+
+# ----------------------
+# 1. 骨架整体法向量和夹角
+# ----------------------
+def calculate_skeleton_normal(skel: Dict) -> Tuple[float, float, float]:
+    """
+    计算骨架的整体法向量（基于躯干平面）
+    躯干平面由左肩、右肩、右髋三点确定（稳定且能反映整体朝向）
+    """
+    # 关键躯干点（确保存在且可见性高）
+    required_points = ['left_shoulder', 'right_shoulder', 'right_hip']
+    for p in required_points:
+        if p not in skel or skel[p]['visibility'] < 0.6:
+            # 若关键躯干点缺失，返回默认向量（降低权重）
+            return (0.0, 1.0, 0.0)  # 假设默认向上
+
+    # 提取三点坐标
+    A = (skel['left_shoulder']['x'], skel['left_shoulder']['y'], skel['left_shoulder']['z'])
+    B = (skel['right_shoulder']['x'], skel['right_shoulder']['y'], skel['right_shoulder']['z'])
+    C = (skel['right_hip']['x'], skel['right_hip']['y'], skel['right_hip']['z'])
+
+    # 计算平面向量 AB 和 AC
+    AB = (B[0]-A[0], B[1]-A[1], B[2]-A[2])
+    AC = (C[0]-A[0], C[1]-A[1], C[2]-A[2])
+
+    # 叉乘求法向量（垂直于躯干平面，反映朝向）
+    normal = (
+        AB[1]*AC[2] - AB[2]*AC[1],
+        AB[2]*AC[0] - AB[0]*AC[2],
+        AB[0]*AC[1] - AB[1]*AC[0]
+    )
+
+    # 归一化法向量
+    norm = math.sqrt(normal[0]**2 + normal[1]** 2 + normal[2]**2)
+    if norm < 1e-6:
+        return (0.0, 1.0, 0.0)  # 避免零向量
+    return (normal[0]/norm, normal[1]/norm, normal[2]/norm)
+
+def calculate_normal_angle(normal1: Tuple[float, float, float], normal2: Tuple[float, float, float]) -> float:
+    """计算两个法向量的夹角（弧度），范围[0, π]，值越大朝向差异越大"""
+    dot_product = sum(a*b for a, b in zip(normal1, normal2))
+    # 防止数值溢出导致的精度问题
+    dot_product = max(min(dot_product, 1.0), -1.0)
+    return math.acos(dot_product)
+
+# ----------------------
+# 2. weighted：加权关键点距离 + 法向量夹角
+# ----------------------
+# 关键点权重（躯干 > 四肢 > 末端）
+WEIGHTED_POINTS = {
+    # 躯干关键点（权重高，稳定性强）
+    'left_shoulder': 1.5, 'right_shoulder': 1.5,
+    'left_hip': 1.5, 'right_hip': 1.5,
+    # 四肢关键点（权重中等）
+    'left_elbow': 1.0, 'right_elbow': 1.0,
+    'left_knee': 1.0, 'right_knee': 1.0,
+    # 末端关键点（权重低，易抖动）
+    'left_wrist': 0.8, 'right_wrist': 0.8,
+    'left_ankle': 0.8, 'right_ankle': 0.8
+}
+
+def weighted_similarity(input_skel: Dict, sample_skel: Dict) -> float:
+    """
+    综合评分 = 关键点距离权重 + 法向量夹角权重
+    值越小，相似度越高（位置接近且朝向一致）
+    """
+    total_distance = 0.0
+    total_weight = 0.0
+
+    for point, weight in WEIGHTED_POINTS.items():
+        if point in input_skel and point in sample_skel:
+            # 可见度加权
+            vis_weight = 0.5 + 0.5 * min(input_skel[point]['visibility'], sample_skel[point]['visibility'])
+            # 3D距离
+            dx = input_skel[point]['x'] - sample_skel[point]['x']
+            dy = input_skel[point]['y'] - sample_skel[point]['y']
+            dz = input_skel[point]['z'] - sample_skel[point]['z']
+            dist = math.sqrt(dx**2 + dy**2 + dz**2)
+            # 累加带权重的距离
+            total_distance += dist * weight * vis_weight
+            total_weight += weight * vis_weight
+
+    avg_distance = total_distance / total_weight if total_weight > 0 else float('inf')
+
+    normal_input = calculate_skeleton_normal(input_skel)
+    normal_sample = calculate_skeleton_normal(sample_skel)
+    angle = calculate_normal_angle(normal_input, normal_sample)  # 弧度，范围[0, π]
+
+    # 融合评分：距离占比60%，朝向夹角占比40%（夹角乘以系数0.1缩放到与距离同量级）
+    return 0.6 * avg_distance + 0.4 * (angle * 0.1)
+
+# ----------------------
+# 3. average：16个关键点的平均距离
+# ----------------------
+AVERAGE_POINTS = [
+    'left_shoulder', 'right_shoulder',
+    'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist',
+    'left_hip', 'right_hip',
+    'left_knee', 'right_knee',
+    'left_ankle', 'right_ankle',
+    'left_heel', 'right_heel',
+    'left_foot_index', 'right_foot_index'
+]
+
+def calculate_point_distance(point1: Dict, point2: Dict) -> float:
+    """计算两个3D关键点之间的加权欧氏距离"""
+    # 可见度低的点权重降低（可见度0-1之间）
+    visibility_weight = 0.5 + 0.5 * min(point1['visibility'], point2['visibility'])
+    distance = math.sqrt(
+        (point1['x'] - point2['x'])**2 +
+        (point1['y'] - point2['y'])** 2 +
+        (point1['z'] - point2['z'])**2
+    )
+    return distance * visibility_weight  # 可见度越高，权重越大
+
+def average_similarity(input_skel: Dict, sample_skel: Dict) -> float:
+    """计算两个骨架的相似度（值越小越相似）：各关键点（可见度加权）距离的平均值"""
+    total_distance = 0.0
+    valid_points = 0
+
+    for point in AVERAGE_POINTS:
+        if point in input_skel and point in sample_skel:
+            total_distance += calculate_point_distance(input_skel[point], sample_skel[point])
+            valid_points += 1
+
+    return total_distance / valid_points if valid_points > 0 else float('inf')